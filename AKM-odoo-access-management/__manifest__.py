@@ -1,6 +1,6 @@
 {
     "name": "OAuth2.0 API Access Management",
-    "version": "18.0.1.0.0",
+    "version": "18.0.1.1.0",
     "summary": "OAuth2.0 API for accessing Odoo data",
     "description": """
         OAuth2.0 API Access Management for Odoo
@@ -28,9 +28,13 @@
     "depends": ["base"],
     "data": [
         "security/ir.model.access.csv",
+        "data/ir_cron.xml",
         "views/akm_oauth_client.xml",
         "views/akm_oauth_consent_template.xml",
         "views/akm_request_log.xml",
+        "views/akm_export_job.xml",
+        "views/akm_index_advisor.xml",
+        "views/akm_webhook.xml",
     ],
     "images": [
         "static/description/banner.png",
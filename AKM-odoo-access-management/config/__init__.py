@@ -1,6 +1,18 @@
 from . import constants
 from . import response
+from . import serialization
+from . import compression
+from . import streaming
+from . import replica
+from . import result_cache
+from . import invalidation
+from . import client_cache
+from . import admission
 from . import utils
+from . import timing
+from . import sql_profiler
+from . import metrics
+from . import log_sampling
 from . import managers
 from . import decorators
 from . import pagination
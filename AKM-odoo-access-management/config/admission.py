@@ -0,0 +1,62 @@
+import time
+from contextlib import contextmanager
+
+from odoo.tools import SQL
+
+# First key of the advisory locks used as concurrency slots ("AKM" + slot)
+ADVISORY_LOCK_NAMESPACE = 0x414B4D00
+MAX_SLOTS = 256
+
+# How long a request waits for a free slot before being rejected, in seconds
+QUEUE_TIMEOUT = 2.0
+RETRY_INTERVAL = 0.1
+
+
+def acquire_slot(cr, client_id: int, limit: int, timeout: float = QUEUE_TIMEOUT):
+    """
+    Take one of the `limit` concurrency slots of a client, shared by all
+    workers, for the rest of the transaction of `cr`.
+
+    Slots are transaction-level advisory locks, released by Postgres when the
+    transaction ends, even if the worker dies. When every slot is taken the
+    request waits up to `timeout` seconds for one to free up.
+
+    Returns:
+        bool: Whether a slot was acquired.
+    """
+    slots = min(limit, MAX_SLOTS)
+    deadline = time.monotonic() + timeout
+    while True:
+        for slot in range(slots):
+            cr.execute(
+                "SELECT pg_try_advisory_xact_lock(%s, %s)",
+                [ADVISORY_LOCK_NAMESPACE + slot, client_id],
+            )
+            if cr.fetchone()[0]:
+                return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(RETRY_INTERVAL)
+
+
+@contextmanager
+def statement_timeout(cr, timeout_ms: int):
+    """
+    Cancel every statement of the block on `cr` running longer than
+    `timeout_ms` milliseconds (no limit when 0).
+
+    The block runs in a savepoint: a cancelled statement raises
+    `psycopg2.errors.QueryCanceled` and only rolls back the block, so the
+    transaction can still be used afterwards (e.g. to log the request).
+    """
+    if not timeout_ms:
+        yield
+        return
+    cr.execute("SHOW statement_timeout")
+    previous = cr.fetchone()[0]
+    with cr.savepoint(flush=False):
+        cr.execute(
+            SQL("SELECT set_config('statement_timeout', %s, true)", str(timeout_ms))
+        )
+        yield
+        cr.execute(SQL("SELECT set_config('statement_timeout', %s, true)", previous))
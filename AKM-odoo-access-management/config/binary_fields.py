@@ -0,0 +1,117 @@
+import base64
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from odoo import models
+
+from .constants import API_PREFIX
+from .serialization import serialize_rows
+from .streaming import Segment
+
+
+def content_url(model_name: str, record_id: int, field_name: str) -> str:
+    """Path of the endpoint streaming the content of a binary field."""
+    return f"{API_PREFIX}/records/{model_name}/{record_id}/{field_name}"
+
+
+def is_binary(field) -> bool:
+    return field.type == "binary"
+
+
+def read_rows(records: models.BaseModel, field_list: List[str]) -> List[Dict[str, Any]]:
+    """
+    `read()` the records and serialize the rows, binary fields excepted: their
+    content is never loaded, they are replaced by a reference to the content
+    endpoint, or None when empty.
+
+        {"url": "/.../records/res.partner/7/image_1920", "size": 5120}
+
+    `size` is the exact size in bytes for the fields stored as attachments,
+    None for the others.
+    """
+    model_fields = records._fields
+    binary_names = [name for name in field_list if is_binary(model_fields[name])]
+    if not binary_names:
+        return serialize_rows(records.read(field_list), model_fields)
+
+    field_list = [name for name in field_list if name not in binary_names]
+    rows = serialize_rows(records.read(field_list), model_fields)
+    sizes = _binary_sizes(records, binary_names)
+    for row in rows:
+        for name in binary_names:
+            key = (row["id"], name)
+            row[name] = None
+            if key in sizes:
+                row[name] = {
+                    "url": content_url(records._name, row["id"], name),
+                    "size": sizes[key],
+                }
+    return rows
+
+
+def _binary_sizes(
+    records: models.BaseModel, field_names: List[str]
+) -> Dict[Tuple[int, str], Optional[int]]:
+    """Size of the non-empty binary values of the records, by `(id, field)`."""
+    sizes = {}
+    stored = [name for name in field_names if records._fields[name].attachment]
+    if stored and records:
+        records.env.cr.execute(
+            """
+            SELECT res_id, res_field, file_size
+            FROM ir_attachment
+            WHERE res_model = %s AND res_field IN %s AND res_id IN %s
+            """,
+            [records._name, tuple(stored), tuple(records.ids)],
+        )
+        for res_id, res_field, file_size in records.env.cr.fetchall():
+            sizes[(res_id, res_field)] = file_size
+
+    others = [name for name in field_names if name not in stored]
+    if others:
+        # With `bin_size`, the other binary fields return a human readable size
+        # instead of their content
+        for row in records.with_context(bin_size=True).read(others):
+            for name in others:
+                if row[name]:
+                    sizes[(row["id"], name)] = None
+    return sizes
+
+
+def get_content(
+    record: models.BaseModel, field_name: str
+) -> Optional[Tuple[List[Segment], str, str]]:
+    """
+    Locate the content of a binary field, streamed from the filestore when
+    it is stored as an attachment.
+
+    Returns:
+        tuple: (segments, etag, mimetype), None when the field is empty.
+    """
+    if record._fields[field_name].attachment:
+        attachment = (
+            record.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", record._name),
+                    ("res_field", "=", field_name),
+                    ("res_id", "=", record.id),
+                ],
+                limit=1,
+            )
+        )
+        if not attachment or not attachment.file_size:
+            return None
+        return (
+            [Segment.from_attachment(attachment)],
+            attachment.checksum,
+            attachment.mimetype or "application/octet-stream",
+        )
+
+    value = record[field_name]
+    if not value:
+        return None
+    data = base64.b64decode(value)
+    etag = hashlib.sha1(data).hexdigest()
+    return [Segment(len(data), data=data)], etag, "application/octet-stream"
@@ -0,0 +1,134 @@
+import threading
+from collections import defaultdict
+from typing import Dict, NamedTuple, Optional
+
+from . import invalidation
+
+_CLIENT_COLUMNS = """
+    SELECT id, client_id, client_secret, scope, is_active,
+           permission_version, allow_compression,
+           max_per_page, max_concurrent_requests, statement_timeout_ms,
+           log_sample_rate
+    FROM akm_oauth_client
+"""
+
+
+class ClientDescriptor(NamedTuple):
+    """Immutable snapshot of what authenticating and serving a client needs."""
+
+    id: int
+    client_id: str
+    client_secret: str
+    scope: str
+    is_active: bool
+    permission_version: int
+    allow_compression: bool
+    max_per_page: int
+    max_concurrent_requests: int
+    statement_timeout_ms: int
+    log_sample_rate: float
+
+
+class _ClientCache:
+    """
+    Descriptors of the OAuth clients of one database, by record id and by
+    public `client_id`, kept current by the `client` invalidation channel.
+    """
+
+    def __init__(self):
+        self.by_id: Dict[int, ClientDescriptor] = {}
+        self.by_client_id: Dict[str, ClientDescriptor] = {}
+        # Bumped on every eviction, a lookup that raced with one is not stored
+        self.generation = 0
+
+    def store(self, descriptor: ClientDescriptor):
+        self.by_id[descriptor.id] = descriptor
+        self.by_client_id[descriptor.client_id] = descriptor
+
+    def evict(self, ids):
+        self.generation += 1
+        if ids is None:
+            self.by_id.clear()
+            self.by_client_id.clear()
+            return
+        for record_id in ids:
+            descriptor = self.by_id.pop(record_id, None)
+            if descriptor is not None:
+                self.by_client_id.pop(descriptor.client_id, None)
+
+
+_caches: Dict[str, _ClientCache] = defaultdict(_ClientCache)
+_lock = threading.Lock()
+
+
+def _on_invalidation(dbname: str, ids):
+    with _lock:
+        _caches[dbname].evict(ids)
+
+
+invalidation.subscribe("client", _on_invalidation)
+
+
+def _lookup(env, column: str, value) -> Optional[ClientDescriptor]:
+    dbname = env.cr.dbname
+    # On every lookup, hits included: descriptors preloaded before the fork
+    # are inherited by workers whose listener is not started yet, and are
+    # only trusted once it is connected
+    listening = invalidation.ensure_listener(dbname)
+    with _lock:
+        cache = _caches[dbname]
+        index = cache.by_id if column == "id" else cache.by_client_id
+        descriptor = index.get(value)
+        generation = cache.generation
+    if descriptor is not None and listening:
+        return descriptor
+
+    # Read on a new cursor: its snapshot starts after `generation` was taken,
+    # so a change committed before is seen and one committed after is caught
+    # by the generation check
+    with env.registry.cursor() as cr:
+        cr.execute(f"{_CLIENT_COLUMNS} WHERE {column} = %s", [value])
+        row = cr.fetchone()
+    if row is None:
+        return None
+    descriptor = ClientDescriptor(*row)
+
+    if listening:
+        with _lock:
+            if cache.generation == generation:
+                cache.store(descriptor)
+    return descriptor
+
+
+def get_client(env, record_id: int) -> Optional[ClientDescriptor]:
+    """Descriptor of the `akm.oauth.client` with this id, if it exists."""
+    if not record_id:
+        return None
+    return _lookup(env, "id", record_id)
+
+
+def get_client_by_client_id(env, client_id: str) -> Optional[ClientDescriptor]:
+    """Descriptor of the client with this public `client_id`, if any."""
+    if not client_id or not isinstance(client_id, str):
+        return None
+    return _lookup(env, "client_id", client_id)
+
+
+def preload(env) -> int:
+    """
+    Cache the descriptors of all active clients, read with the cursor of
+    `env`. The caller records the invalidation baseline before reading.
+
+    Returns:
+        int: Number of descriptors loaded.
+    """
+    with _lock:
+        cache = _caches[env.cr.dbname]
+        generation = cache.generation
+    env.cr.execute(f"{_CLIENT_COLUMNS} WHERE is_active")
+    descriptors = [ClientDescriptor(*row) for row in env.cr.fetchall()]
+    with _lock:
+        if cache.generation == generation:
+            for descriptor in descriptors:
+                cache.store(descriptor)
+    return len(descriptors)
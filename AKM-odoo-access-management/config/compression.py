@@ -0,0 +1,73 @@
+import time
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is only offered when python-zstandard is installed
+    zstandard = None
+
+# Responses smaller than this are sent as-is, compressing them costs more than
+# it saves
+DEFAULT_MIN_SIZE = 1024
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Content codings this server can produce, in order of preference."""
+    return ("zstd", "gzip") if zstandard else ("gzip",)
+
+
+def negotiate_encoding(accept_encodings) -> Optional[str]:
+    """
+    Pick the content coding to use from the client's `Accept-Encoding`.
+
+    Args:
+        accept_encodings: The werkzeug `Accept` object of the request
+            (`httprequest.accept_encodings`).
+
+    Returns:
+        str or None: "zstd", "gzip" or None when none is acceptable.
+    """
+    best, best_quality = None, 0
+    for encoding in supported_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compressor(encoding: str):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    # wbits=31: zlib deflate with a gzip header and trailer
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def compress(data: bytes, encoding: str) -> Tuple[bytes, float]:
+    """
+    Compress a whole payload.
+
+    Returns:
+        tuple: (compressed data, seconds spent compressing)
+    """
+    start = time.perf_counter()
+    compressor = _compressor(encoding)
+    compressed = compressor.compress(data) + compressor.flush()
+    return compressed, time.perf_counter() - start
+
+
+def iter_compress(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Compress a stream of chunks without holding the whole payload in memory.
+    """
+    compressor = _compressor(encoding)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    tail = compressor.flush()
+    if tail:
+        yield tail
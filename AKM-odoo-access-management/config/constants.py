@@ -7,3 +7,72 @@ API_PREFIX = f"/{MODULE_NAME}/{API_VERSION}"
 
 ACCESS_TOKEN_EXPIRY = timedelta(hours=1)
 REFRESH_TOKEN_EXPIRY = timedelta(days=30)
+
+# ir.config_parameter keys
+CONFIG_PARAM_PREFIX = "akm_oauth"
+PHASE_TIMING_PARAM = f"{CONFIG_PARAM_PREFIX}.phase_timing"
+SQL_PROFILING_PARAM = f"{CONFIG_PARAM_PREFIX}.sql_profiling"
+SQL_PROFILING_TOP_N_PARAM = f"{CONFIG_PARAM_PREFIX}.sql_profiling_top_n"
+SQL_PROFILING_DEFAULT_TOP_N = 5
+METRICS_TOKEN_PARAM = f"{CONFIG_PARAM_PREFIX}.metrics_token"
+COMPRESSION_MIN_SIZE_PARAM = f"{CONFIG_PARAM_PREFIX}.compression_min_size"
+
+# Request log sampling, see `log_sampling.log_sample_weight`
+LOG_SAMPLE_RATE_PARAM = f"{CONFIG_PARAM_PREFIX}.log_sample_rate"
+LOG_SLOW_THRESHOLD_PARAM = f"{CONFIG_PARAM_PREFIX}.log_slow_threshold_ms"
+LOG_DEFAULT_SLOW_THRESHOLD_MS = 1000
+
+# A refresh token or authorization code redeemed again within this many
+# seconds returns the tokens of the first redemption, 0 disables the replay
+TOKEN_REPLAY_WINDOW_PARAM = f"{CONFIG_PARAM_PREFIX}.token_replay_window"
+TOKEN_DEFAULT_REPLAY_WINDOW = 10
+
+# Logged request parameters: longer strings and lists are truncated
+LOG_PARAM_MAX_STRING = 256
+LOG_PARAM_MAX_ITEMS = 50
+# Endpoints and user agents are stored truncated, client-controlled strings
+# must stay well below the btree row size limit of their unique index
+LOG_LOOKUP_MAX_LENGTH = 512
+
+# /records result cache, disabled while its size is 0
+RECORDS_CACHE_SIZE_PARAM = f"{CONFIG_PARAM_PREFIX}.records_cache_size"
+RECORDS_CACHE_TTL_PARAM = f"{CONFIG_PARAM_PREFIX}.records_cache_ttl"
+RECORDS_CACHE_DEFAULT_TTL = 60
+RECORDS_CACHE_MAX_ROWS = 1000
+
+# Maximum number of ids of a /records/by_ids request
+RECORDS_BY_IDS_MAX = 1000
+
+# /records pages are read in chunks of ids and end early past a size budget
+RECORDS_READ_CHUNK_SIZE = 200
+RECORDS_PAGE_MAX_BYTES_PARAM = f"{CONFIG_PARAM_PREFIX}.records_page_max_bytes"
+RECORDS_PAGE_DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# /records result sessions, see `akm.result.session`
+RESULT_SESSION_TTL_PARAM = f"{CONFIG_PARAM_PREFIX}.result_session_ttl"
+RESULT_SESSION_DEFAULT_TTL = 900
+RESULT_SESSION_MAX_IDS = 1000000
+
+# Webhook delivery, see `akm.webhook.event._cron_deliver`
+WEBHOOK_BATCH_SIZE = 500
+WEBHOOK_MAX_ATTEMPTS = 8
+WEBHOOK_RETRY_DELAY = 30  # seconds, doubled after every failed attempt
+WEBHOOK_MAX_RETRY_DELAY = 6 * 3600
+WEBHOOK_TIMEOUT = 10
+WEBHOOK_CRON_BUDGET = 50  # seconds of delivery per cron run
+WEBHOOK_DEAD_RETENTION = timedelta(days=30)
+# Comma-separated hosts that webhooks may target even though they resolve to a
+# loopback, private or link-local address
+WEBHOOK_ALLOWED_HOSTS_PARAM = f"{CONFIG_PARAM_PREFIX}.webhook_allowed_hosts"
+
+# Export jobs
+EXPORT_MAX_THREADS_PARAM = f"{CONFIG_PARAM_PREFIX}.export_max_threads"
+EXPORT_DEFAULT_MAX_THREADS = 4
+EXPORT_READ_BATCH_SIZE = 1000
+EXPORT_ROWS_PER_FILE = 50000
+EXPORT_RETENTION = timedelta(days=7)
+# Running jobs whose heartbeat, updated after every chunk file, is older than
+# this lost their cron worker (crash, time limit): they are requeued, and failed
+# once they were started this many times
+EXPORT_HEARTBEAT_TIMEOUT = timedelta(minutes=15)
+EXPORT_MAX_ATTEMPTS = 2
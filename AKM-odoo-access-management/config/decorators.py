@@ -1,13 +1,87 @@
 import functools
-import json
 import time
 from datetime import datetime, timezone
-from typing import Callable
+from typing import Callable, Dict, Optional, Tuple
 
+from odoo import models
 from odoo.http import request
+from .constants import (
+    PHASE_TIMING_PARAM,
+    SQL_PROFILING_DEFAULT_TOP_N,
+    SQL_PROFILING_PARAM,
+    SQL_PROFILING_TOP_N_PARAM,
+)
+from . import client_cache, metrics
+from .log_sampling import log_sample_weight
 from .managers import TokenManager
 from .response import APIResponse
-from .utils import make_serializable
+from .sql_profiler import SQLProfiler
+from .timing import NULL_TIMER, PhaseTimer, current_timer
+from .utils import get_config_flag, get_config_int
+
+
+def _authenticate_request() -> Tuple[Optional[models.Model], Optional[Dict]]:
+    """
+    Authenticate the current request from its Bearer token.
+
+    Returns:
+        tuple: (client, None) on success, (None, error_response) otherwise.
+    """
+    auth_header = request.httprequest.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None, APIResponse.error(
+            message="Missing or invalid Authorization header",
+            error_code="UNAUTHORIZED",
+            status_code=401,
+        )
+
+    access_token = auth_header.split("Bearer ")[1]
+
+    # Decode the token to get payload
+    payload = TokenManager.decode_payload(access_token)
+    if not payload:
+        return None, APIResponse.error(
+            message="Invalid token payload",
+            error_code="INVALID_TOKEN",
+            status_code=401,
+        )
+
+    # Retrieve token record
+    token_record = TokenManager.get_token_record(access_token, request.env)
+    if not token_record:
+        return None, APIResponse.error(
+            message="Token not found",
+            error_code="INVALID_TOKEN",
+            status_code=401,
+        )
+
+    # Check if token's client is active
+    descriptor = client_cache.get_client(request.env, token_record.client_id.id)
+    if not descriptor or not descriptor.is_active:
+        return None, APIResponse.error(
+            message="Client associated with the token is inactive",
+            error_code="INACTIVE_CLIENT",
+            status_code=401,
+        )
+
+    # Check token expiration
+    if datetime.now(timezone.utc).timestamp() > payload.get("exp", 0):
+        return None, APIResponse.error(
+            message="Token has expired",
+            error_code="TOKEN_EXPIRED",
+            status_code=401,
+        )
+
+    # Validate token signature
+    if not TokenManager.validate_signature(access_token, descriptor.client_secret):
+        return None, APIResponse.error(
+            message="Invalid token signature",
+            error_code="INVALID_SIGNATURE",
+            status_code=401,
+        )
+
+    request.akm_client_descriptor = descriptor
+    return request.env["akm.oauth.client"].sudo().browse(descriptor.id), None
 
 
 def require_authenticated_client(func: Callable) -> Callable:
@@ -53,63 +127,15 @@ def require_authenticated_client(func: Callable) -> Callable:
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        auth_header = request.httprequest.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return APIResponse.error(
-                message="Missing or invalid Authorization header",
-                error_code="UNAUTHORIZED",
-                status_code=401,
-            )
+        with current_timer().phase("auth"):
+            client, error = _authenticate_request()
+        metrics.count_auth(error["error_code"] if error else "success")
+        if error:
+            return error
 
-        access_token = auth_header.split("Bearer ")[1]
-
-        # Decode the token to get payload
-        payload = TokenManager.decode_payload(access_token)
-        if not payload:
-            return APIResponse.error(
-                message="Invalid token payload",
-                error_code="INVALID_TOKEN",
-                status_code=401,
-            )
-
-        # Retrieve token record
-        token_record = TokenManager.get_token_record(access_token, request.env)
-        if not token_record:
-            return APIResponse.error(
-                message="Token not found",
-                error_code="INVALID_TOKEN",
-                status_code=401,
-            )
-
-        # Check if token's client is active
-        client_id = token_record.client_id.id
-        if not TokenManager.is_client_active(client_id, request.env):
-            return APIResponse.error(
-                message="Client associated with the token is inactive",
-                error_code="INACTIVE_CLIENT",
-                status_code=401,
-            )
-
-        # Check token expiration
-        if datetime.now(timezone.utc).timestamp() > payload.get("exp", 0):
-            return APIResponse.error(
-                message="Token has expired",
-                error_code="TOKEN_EXPIRED",
-                status_code=401,
-            )
-
-        # Validate token signature
-        if not TokenManager.validate_signature(
-            access_token, token_record.client_id.client_secret
-        ):
-            return APIResponse.error(
-                message="Invalid token signature",
-                error_code="INVALID_SIGNATURE",
-                status_code=401,
-            )
-
-        # Attach the client to kwargs
-        kwargs["client"] = token_record.client_id
+        # Attach the client to kwargs, and to the request for the other decorators
+        kwargs["client"] = client
+        request.akm_client = client
 
         return func(*args, **kwargs)
 
@@ -124,6 +150,20 @@ def log_request(func: Callable) -> Callable:
     you are not interested in logging unauthenticated requests then place it after
     `@require_authenticated_client`
 
+    When the `akm_oauth.phase_timing` system parameter is enabled, a `PhaseTimer`
+    is attached to the request so that the decorators and controllers can record
+    the time spent per phase (auth, permission, search, read, serialize). The
+    breakdown is returned in the `Server-Timing` header and stored on the log row.
+
+    When `akm_oauth.sql_profiling` is enabled, the queries executed on the request
+    cursor are counted and timed (see `SQLProfiler`), the `akm_oauth.sql_profiling_top_n`
+    slowest statements are kept on the log row, and admin-scoped clients receive
+    the statistics in the `X-AKM-SQL` response header.
+
+    Every request is also counted in the Prometheus metrics served by `/metrics`.
+
+    Successful requests may only be sampled into the log, see
+    `log_sampling.log_sample_weight`; errors and slow requests are always logged.
 
     Args:
         func (Callable): The controller method to be decorated.
@@ -136,8 +176,23 @@ def log_request(func: Callable) -> Callable:
     def wrapper(*args, **kwargs):
         start_time = time.time()
         status_code = 200
+        error_code = None
         client_id = None
 
+        timer = (
+            PhaseTimer()
+            if get_config_flag(request.env, PHASE_TIMING_PARAM)
+            else NULL_TIMER
+        )
+        request.akm_timer = timer
+
+        profiler = None
+        if get_config_flag(request.env, SQL_PROFILING_PARAM):
+            top_n = get_config_int(
+                request.env, SQL_PROFILING_TOP_N_PARAM, SQL_PROFILING_DEFAULT_TOP_N
+            )
+            profiler = SQLProfiler(request.env.cr, top_n=top_n).start()
+
         try:
             # Attempt to extract client ID from Authorization header
             # This is useful for logging requests without requiring authentication
@@ -155,6 +210,7 @@ def log_request(func: Callable) -> Callable:
             response = func(*args, **kwargs)
             if isinstance(response, dict) and "status_code" in response:
                 status_code = response.get("status_code", 200)
+                error_code = response.get("error_code")
             elif hasattr(response, "status_code"):
                 status_code = response.status_code
             return response
@@ -164,18 +220,82 @@ def log_request(func: Callable) -> Callable:
         finally:
             end_time = time.time()
             duration = end_time - start_time
+            if profiler:
+                profiler.stop()
             env = request.env
-            values = {
-                "endpoint": request.httprequest.path,
-                "method": request.httprequest.method,
-                "request_params": json.dumps(make_serializable(kwargs or {})),
-                "status_code": status_code,
-                "client_id": client_id or kwargs.get("client", {}).get("id"),
-                "ip_address": request.httprequest.remote_addr,
-                "user_agent": request.httprequest.user_agent.string,
-                "duration": duration,
-            }
-
-            env["akm.request.log"].sudo().create(values)
+            endpoint = request.httprequest.path
+            client_id = client_id or kwargs.get("client", {}).get("id")
+
+            if timer.enabled:
+                request.future_response.headers["Server-Timing"] = timer.server_timing(
+                    duration
+                )
+
+            if profiler:
+                client = getattr(request, "akm_client", None)
+                if client and client.scope == "admin":
+                    request.future_response.headers["X-AKM-SQL"] = (
+                        profiler.debug_header()
+                    )
+
+            metrics.observe_request(
+                getattr(request, "akm_route", endpoint),
+                client_id,
+                status_code,
+                duration,
+            )
+
+            descriptor = getattr(request, "akm_client_descriptor", None)
+            weight = log_sample_weight(
+                env,
+                endpoint,
+                descriptor.log_sample_rate if descriptor else 1.0,
+                status_code,
+                duration,
+            )
+            request.akm_log = env["akm.request.log"].sudo()
+            if weight is not None:
+                # The client is stored in `client_id`
+                params = {k: v for k, v in kwargs.items() if k != "client"}
+                values = {
+                    **request.akm_log._prepare_request_values(
+                        endpoint, request.httprequest.user_agent.string, params
+                    ),
+                    "method": request.httprequest.method,
+                    "status_code": status_code,
+                    "error_code": error_code,
+                    "client_id": client_id,
+                    "ip_address": request.httprequest.remote_addr,
+                    "duration": duration,
+                    "sample_weight": weight,
+                    "replica_read": getattr(request, "akm_replica_read", False),
+                    **timer.log_values(),
+                }
+                if profiler:
+                    values.update(profiler.log_values())
+                request.akm_log = request.akm_log.create(values)
+
+    return wrapper
+
+
+def json_error_response(func: Callable) -> Callable:
+    """
+    Decorator for `type="http"` routes protected by `@require_authenticated_client`.
+
+    The authentication and validation helpers return `APIResponse` dictionaries,
+    which only `type="json"` routes can return as-is; this decorator renders them
+    as JSON HTTP responses with their `status_code`.
+
+    Place it between `@log_request` and `@require_authenticated_client`.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        response = func(*args, **kwargs)
+        if isinstance(response, dict):
+            return request.make_json_response(
+                response, status=response.get("status_code", 200)
+            )
+        return response
 
     return wrapper
@@ -0,0 +1,232 @@
+"""
+Cross-worker cache invalidation through Postgres LISTEN/NOTIFY.
+
+Writers `publish(env, channel, key)`; the messages of a transaction are sent
+with one `NOTIFY` when it commits, so they never reach other workers before the
+data is visible. Every process runs one listener thread per database that
+calls the callbacks `subscribe`d to the channel with the changed keys.
+
+Each notification carries a number of the `akm_invalidation_seq` sequence.
+The listener regularly compares the last number it received with the
+sequence: when a notification was missed (e.g. the listening connection
+dropped), every subscriber is flushed rather than risking stale entries.
+"""
+
+import json
+import logging
+import os
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+from odoo.sql_db import db_connect
+
+_logger = logging.getLogger(__name__)
+
+PG_CHANNEL = "akm_invalidation"
+SEQUENCE = "akm_invalidation_seq"
+
+# Seconds between two sequence checks of a listener, and before reconnecting
+POLL_INTERVAL = 10.0
+RECONNECT_DELAY = 5.0
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more; past this size the
+# channels are flushed instead of listing the keys
+MAX_PAYLOAD = 7000
+
+# `callback(dbname, keys)`, `keys` is None to flush the whole channel
+Callback = Callable[[str, Optional[Iterable[Hashable]]], None]
+
+_subscribers: Dict[str, List[Callback]] = defaultdict(list)
+
+# Sequence number read before caches were preloaded without a listener, by
+# database; see `set_baseline`
+_baselines: Dict[str, int] = {}
+
+
+def subscribe(channel: str, callback: Callback):
+    """Call `callback(dbname, keys)` when entries of `channel` change."""
+    _subscribers[channel].append(callback)
+
+
+def create_sequence(cr):
+    cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE}")
+
+
+def current_seq(cr) -> int:
+    """Number of the last invalidation message sent on the database."""
+    cr.execute(f"SELECT last_value, is_called FROM {SEQUENCE}")
+    last_value, is_called = cr.fetchone()
+    return last_value if is_called else 0
+
+
+def set_baseline(dbname: str, seq: int):
+    """
+    Record that caches of `dbname` were filled while no listener was
+    connected, e.g. preloaded before the workers are forked, and were current
+    as of message `seq`. When the listener of a process first connects, the
+    caches are flushed if messages were sent since.
+    """
+    _baselines[dbname] = min(seq, _baselines.get(dbname, seq))
+
+
+def publish(env, channel: str, key: Hashable):
+    """
+    Announce that `key` of `channel` changed, once the transaction of `env`
+    commits. The current process is notified right after the commit, the
+    others as soon as their listener gets the notification.
+    """
+    data = env.cr.precommit.data
+    messages = data.get("akm.invalidation")
+    if messages is None:
+        messages = data["akm.invalidation"] = set()
+        cr = env.cr
+        dbname = cr.dbname
+
+        @cr.precommit.add
+        def notify():
+            if not messages:
+                return
+            cr.execute("SELECT nextval(%s)", [SEQUENCE])
+            payload = _encode(cr.fetchone()[0], messages)
+            cr.execute("SELECT pg_notify(%s, %s)", [PG_CHANNEL, payload])
+
+        @cr.postcommit.add
+        def dispatch_locally():
+            _dispatch(dbname, _group(messages))
+
+    messages.add((channel, key))
+
+
+def _group(messages) -> Dict[str, Optional[set]]:
+    keys = defaultdict(set)
+    for channel, key in messages:
+        keys[channel].add(key)
+    return keys
+
+
+def _encode(seq: int, messages) -> str:
+    payload = json.dumps({"seq": seq, "messages": sorted(messages, key=repr)})
+    if len(payload) > MAX_PAYLOAD:
+        flushed = sorted({channel for channel, _ in messages})
+        payload = json.dumps({"seq": seq, "flush": flushed})
+    return payload
+
+
+def _dispatch(dbname: str, keys_by_channel: Dict[str, Optional[set]]):
+    for channel, keys in keys_by_channel.items():
+        for callback in _subscribers.get(channel, ()):
+            try:
+                callback(dbname, keys)
+            except Exception:
+                _logger.exception("Cache invalidation of %r failed", channel)
+
+
+def flush_all(dbname: str):
+    _dispatch(dbname, {channel: None for channel in list(_subscribers)})
+
+
+class _Listener(threading.Thread):
+    """LISTEN loop of one process on one database."""
+
+    def __init__(self, dbname: str):
+        super().__init__(name=f"akm.invalidation.{dbname}", daemon=True)
+        self.dbname = dbname
+        self.last_seq = 0
+        self.connected = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                _logger.warning(
+                    "Invalidation listener of %r lost its connection",
+                    self.dbname,
+                    exc_info=True,
+                )
+            self.connected.clear()
+            # Notifications sent while disconnected are lost
+            flush_all(self.dbname)
+            time.sleep(RECONNECT_DELAY)
+
+    def _listen(self):
+        with db_connect(self.dbname).cursor() as cr:
+            conn = cr._cnx
+            cr.execute(f"LISTEN {PG_CHANNEL}")
+            cr.commit()
+            polled_seq = self._current_seq(cr)
+            self.last_seq = max(self.last_seq, polled_seq)
+            baseline = _baselines.pop(self.dbname, None)
+            if baseline is not None and polled_seq > baseline:
+                flush_all(self.dbname)
+            self.connected.set()
+            next_check = time.monotonic() + POLL_INTERVAL
+            while True:
+                timeout = max(next_check - time.monotonic(), 0)
+                if select.select([conn], [], [], timeout) != ([], [], []):
+                    conn.poll()
+                    while conn.notifies:
+                        self._handle(conn.notifies.pop(0).payload)
+                if time.monotonic() >= next_check:
+                    # A number allocated before the previous check belongs to
+                    # a transaction committed since, its notification is due
+                    if polled_seq > self.last_seq:
+                        _logger.info(
+                            "Missed cache invalidations on %r, flushing", self.dbname
+                        )
+                        flush_all(self.dbname)
+                        self.last_seq = polled_seq
+                    polled_seq = self._current_seq(cr)
+                    next_check = time.monotonic() + POLL_INTERVAL
+
+    def _current_seq(self, cr) -> int:
+        seq = current_seq(cr)
+        cr.commit()
+        return seq
+
+    def _handle(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        self.last_seq = max(self.last_seq, message.get("seq", 0))
+        if "flush" in message:
+            keys = {channel: None for channel in message["flush"]}
+        else:
+            keys = _group(tuple(item) for item in message.get("messages", ()))
+        _dispatch(self.dbname, keys)
+
+
+_listeners: Dict[str, _Listener] = {}
+_listeners_pid: Optional[int] = None
+_listeners_lock = threading.Lock()
+
+
+def ensure_listener(dbname: str) -> bool:
+    """
+    Start the listener of `dbname` in this process if needed (listeners do
+    not survive a fork), and return whether it is connected. Caches should
+    not keep entries while it is not.
+    """
+    global _listeners_pid
+    pid = os.getpid()
+    listener = _listeners.get(dbname) if _listeners_pid == pid else None
+    if listener is None:
+        with _listeners_lock:
+            if _listeners_pid != pid:
+                _listeners.clear()
+                _listeners_pid = pid
+            listener = _listeners.get(dbname)
+            if listener is None:
+                listener = _listeners[dbname] = _Listener(dbname)
+                listener.start()
+    return listener.connected.is_set()
+
+
+def is_listening(dbname: str) -> bool:
+    """Whether this process has a connected listener on `dbname`."""
+    listener = _listeners.get(dbname) if _listeners_pid == os.getpid() else None
+    return listener is not None and listener.connected.is_set()
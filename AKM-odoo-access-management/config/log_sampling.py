@@ -0,0 +1,50 @@
+import random
+from typing import Optional
+
+from .constants import (
+    API_PREFIX,
+    LOG_SAMPLE_RATE_PARAM,
+    LOG_SLOW_THRESHOLD_PARAM,
+    LOG_DEFAULT_SLOW_THRESHOLD_MS,
+)
+from .utils import get_config_float, get_config_int
+
+
+def endpoint_key(path: str) -> str:
+    """Name of the endpoint of `path` in sampling parameters, e.g. `records`."""
+    if path.startswith(API_PREFIX):
+        path = path[len(API_PREFIX) :]
+    return path.strip("/").split("/", 1)[0]
+
+
+def log_sample_weight(
+    env, path: str, client_rate: float, status_code: int, duration: float
+) -> Optional[float]:
+    """
+    Decide whether a request is logged, and with which weight.
+
+    Errors (status >= 400) and requests slower than `akm_oauth.log_slow_threshold_ms`
+    are always logged, with weight 1. Other requests are logged with probability
+    `rate`, the product of the endpoint rate (`akm_oauth.log_sample_rate.<endpoint>`,
+    else `akm_oauth.log_sample_rate`, default 1) and the client rate, and then
+    stand for `1 / rate` requests.
+
+    Returns:
+        float or None: The weight of the log row, None to skip logging.
+    """
+    slow_threshold = get_config_int(
+        env, LOG_SLOW_THRESHOLD_PARAM, LOG_DEFAULT_SLOW_THRESHOLD_MS
+    )
+    if status_code >= 400 or duration * 1000 >= slow_threshold:
+        return 1.0
+
+    default_rate = get_config_float(env, LOG_SAMPLE_RATE_PARAM, 1.0)
+    endpoint_rate = get_config_float(
+        env, f"{LOG_SAMPLE_RATE_PARAM}.{endpoint_key(path)}", default_rate
+    )
+    rate = min(max(endpoint_rate * client_rate, 0.0), 1.0)
+    if rate >= 1.0:
+        return 1.0
+    if rate <= 0.0 or random.random() >= rate:
+        return None
+    return 1.0 / rate
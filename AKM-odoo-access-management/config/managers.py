@@ -7,6 +7,8 @@ from typing import Optional, Dict
 from datetime import datetime, timezone
 from odoo import models
 
+from . import client_cache
+
 
 class TokenManager:
     """
@@ -153,7 +155,5 @@ class TokenManager:
         """
         Check if the client associated with the given client_id is active.
         """
-        client = (
-            env["akm.oauth.client"].sudo().search([("id", "=", client_id)], limit=1)
-        )
-        return client.exists() and client.is_active
+        descriptor = client_cache.get_client(env, client_id)
+        return bool(descriptor and descriptor.is_active)
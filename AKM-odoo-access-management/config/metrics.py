@@ -0,0 +1,335 @@
+import functools
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Dict, Iterator, Optional, Tuple
+
+from odoo.tools import config
+
+try:
+    import fcntl
+except ImportError:  # Windows, a single process, there are no dead workers to merge
+    fcntl = None
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+INITIAL_FILE_SIZE = 64 * 1024
+_HEADER = struct.Struct("i")  # bytes used in the file, header included
+_KEY_LENGTH = struct.Struct("i")
+_VALUE = struct.Struct("d")
+
+# Counters of the workers that exited, see `_merge_dead_stores`
+ARCHIVE_FILE = "akm_metrics_archive.db"
+LOCK_FILE = "akm_metrics.lock"
+
+METRICS = {
+    "akm_requests_total": (
+        "counter",
+        "API requests handled, by endpoint, client and HTTP status.",
+    ),
+    "akm_request_duration_seconds": (
+        "histogram",
+        "API request duration in seconds, by endpoint.",
+    ),
+    "akm_auth_total": (
+        "counter",
+        "Bearer token authentications, by outcome.",
+    ),
+    "akm_records_cache_total": (
+        "counter",
+        "Lookups in the /records result cache, by result (hit or miss).",
+    ),
+}
+
+
+def _padded(length: int) -> int:
+    """Round `length` up so that the value that follows is 8-byte aligned."""
+    return length + (8 - (length + _KEY_LENGTH.size) % 8) % 8
+
+
+class MmapedValues:
+    """
+    A `key -> float` store backed by a memory-mapped file.
+
+    Each worker process owns one file, so writes never contend across
+    processes; the `/metrics` route sums the files of all workers.
+
+    File layout: a 4-byte header holding the number of used bytes, padded to
+    8 bytes, followed by entries of `[4-byte key length][key][padding][double]`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._positions: Dict[str, int] = {}
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(INITIAL_FILE_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = _HEADER.unpack_from(self._map, 0)[0]
+        if self._used == 0:
+            self._used = 8
+            _HEADER.pack_into(self._map, 0, self._used)
+        for key, _, position in _iter_entries(self._map, self._used):
+            self._positions[key] = position
+
+    def _grow(self, needed: int):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        self._map.close()
+        self._file.truncate(capacity)
+        self._capacity = capacity
+        self._map = mmap.mmap(self._file.fileno(), capacity)
+
+    def _position(self, key: str) -> int:
+        position = self._positions.get(key)
+        if position is None:
+            encoded = key.encode("utf-8")
+            padded = _padded(len(encoded))
+            entry_size = _KEY_LENGTH.size + padded + _VALUE.size
+            if self._used + entry_size > self._capacity:
+                self._grow(self._used + entry_size)
+            offset = self._used
+            _KEY_LENGTH.pack_into(self._map, offset, len(encoded))
+            self._map[offset + 4 : offset + 4 + len(encoded)] = encoded
+            position = offset + _KEY_LENGTH.size + padded
+            _VALUE.pack_into(self._map, position, 0.0)
+            self._used += entry_size
+            _HEADER.pack_into(self._map, 0, self._used)
+            self._positions[key] = position
+        return position
+
+    def increment(self, key: str, amount: float = 1.0):
+        with self._lock:
+            position = self._position(key)
+            value = _VALUE.unpack_from(self._map, position)[0]
+            _VALUE.pack_into(self._map, position, value + amount)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _iter_entries(data, used: int) -> Iterator[Tuple[str, float, int]]:
+    """Yield `(key, value, value_position)` for the entries of a metrics file."""
+    offset = 8
+    while offset + _KEY_LENGTH.size <= used:
+        length = _KEY_LENGTH.unpack_from(data, offset)[0]
+        key = bytes(data[offset + 4 : offset + 4 + length]).decode("utf-8")
+        position = offset + _KEY_LENGTH.size + _padded(length)
+        if position + _VALUE.size > used:
+            break
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        offset = position + _VALUE.size
+
+
+def metrics_directory() -> str:
+    """
+    Directory shared by the workers for their metrics files, `akm_metrics_dir`
+    in the Odoo configuration file or a folder in the system temp directory.
+    """
+    directory = config.get("akm_metrics_dir") or os.path.join(
+        tempfile.gettempdir(), "akm_metrics"
+    )
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+_store: Optional[MmapedValues] = None
+_store_pid: Optional[int] = None
+_store_lock = threading.Lock()
+
+
+def _current_store() -> MmapedValues:
+    """Return the store of the current process, (re)opened after a fork."""
+    global _store, _store_pid
+    pid = os.getpid()
+    if _store_pid != pid:
+        with _store_lock:
+            if _store_pid != pid:
+                directory = metrics_directory()
+                _merge_dead_stores(directory)
+                path = os.path.join(directory, f"akm_metrics_{pid}.db")
+                _store = MmapedValues(path)
+                _store_pid = pid
+    return _store
+
+
+def _read_entries(path: str) -> Iterator[Tuple[str, float, int]]:
+    with open(path, "rb") as metrics_file:
+        data = metrics_file.read()
+    if len(data) < _HEADER.size:
+        return iter(())
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    return _iter_entries(data, used)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # alive, run by another user
+    return True
+
+
+class _DirectoryLock:
+    """
+    Lock of the metrics directory: exclusive to merge the files of dead
+    workers, shared to read the files, so a scrape never counts a file twice.
+    """
+
+    def __init__(self, directory: str, exclusive: bool):
+        self.path = os.path.join(directory, LOCK_FILE)
+        self.exclusive = exclusive
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._file = open(self.path, "a")
+            fcntl.flock(self._file, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+
+
+def _merge_dead_stores(directory: str):
+    """
+    Add the counters of the workers that exited (recycled after
+    `limit_request`, killed by the memory limits, ...) to the archive file and
+    delete their files, so the directory does not grow with every worker.
+    """
+    if fcntl is None:
+        return
+    try:
+        with _DirectoryLock(directory, exclusive=True):
+            archive = None
+            for path in glob.glob(os.path.join(directory, "akm_metrics_*.db")):
+                pid = os.path.basename(path)[len("akm_metrics_") : -len(".db")]
+                if not pid.isdigit() or _is_alive(int(pid)):
+                    continue
+                if archive is None:
+                    archive = MmapedValues(os.path.join(directory, ARCHIVE_FILE))
+                for key, value, _ in _read_entries(path):
+                    archive.increment(key, value)
+                os.remove(path)
+            if archive is not None:
+                archive.close()
+    except OSError:
+        _logger.warning("Unable to merge the metrics of exited workers", exc_info=True)
+
+
+def _key(name: str, **labels) -> str:
+    return json.dumps([name, sorted(labels.items())], separators=(",", ":"))
+
+
+def _never_fail(func):
+    """Metrics must never break the request they describe."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            _logger.warning("Unable to record API metrics", exc_info=True)
+
+    return wrapper
+
+
+@_never_fail
+def observe_request(endpoint: str, client_id, status_code: int, duration: float):
+    """Count an API request and add its duration to the histogram."""
+    store = _current_store()
+    client = str(client_id) if client_id else "anonymous"
+    store.increment(
+        _key(
+            "akm_requests_total",
+            endpoint=endpoint,
+            client=client,
+            status=str(status_code),
+        )
+    )
+    for bound in DURATION_BUCKETS:
+        if duration <= bound:
+            store.increment(
+                _key("akm_request_duration_seconds_bucket", endpoint=endpoint, le=bound)
+            )
+    store.increment(
+        _key("akm_request_duration_seconds_bucket", endpoint=endpoint, le="+Inf")
+    )
+    store.increment(
+        _key("akm_request_duration_seconds_sum", endpoint=endpoint), duration
+    )
+    store.increment(_key("akm_request_duration_seconds_count", endpoint=endpoint))
+
+
+@_never_fail
+def count_auth(outcome: str):
+    """Count a Bearer token authentication by outcome (`success` or error code)."""
+    _current_store().increment(_key("akm_auth_total", outcome=outcome))
+
+
+@_never_fail
+def count_cache(result: str):
+    """Count a `/records` result cache lookup (`hit` or `miss`)."""
+    _current_store().increment(_key("akm_records_cache_total", result=result))
+
+
+def _metric_family(sample_name: str) -> str:
+    for suffix in ("_bucket", "_sum", "_count"):
+        if sample_name.endswith(suffix) and sample_name[: -len(suffix)] in METRICS:
+            return sample_name[: -len(suffix)]
+    return sample_name
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _sample_sort_key(sample):
+    name, labels, _ = sample
+    # Order histogram buckets numerically rather than by their label text
+    return name, [(k, float(v) if k == "le" else 0.0, v) for k, v in labels]
+
+
+def render() -> str:
+    """
+    Aggregate the metrics files of all workers, and the archive of the exited
+    ones, into the Prometheus text format.
+    """
+    samples = defaultdict(float)
+    directory = metrics_directory()
+    with _DirectoryLock(directory, exclusive=False):
+        for path in glob.glob(os.path.join(directory, "akm_metrics_*.db")):
+            for key, value, _ in _read_entries(path):
+                samples[key] += value
+
+    families = defaultdict(list)
+    for key, value in samples.items():
+        name, labels = json.loads(key)
+        families[_metric_family(name)].append((name, labels, value))
+
+    lines = []
+    for family in sorted(families):
+        metric_type, help_text = METRICS.get(family, ("untyped", ""))
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {metric_type}")
+        for name, labels, value in sorted(families[family], key=_sample_sort_key):
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {value!r}")
+    return "\n".join(lines) + "\n"
@@ -1,25 +1,128 @@
+from typing import Any, Dict, List
+
+from odoo.tools import SQL
+
+from .binary_fields import read_rows
+from .serialization import dumps_bytes
+
+# How `total_records` is computed, see `Pagination.to_response`
+COUNT_MODES = ("exact", "estimated", "none")
+
+# Rows encoded to estimate the size of a chunk, see `estimate_size`
+SIZE_SAMPLE_ROWS = 8
+
+
 class Pagination:
     """
     Simple pluggable pagination class.
     Can be reused in different controllers.
     """
 
-    def __init__(self, page=1, per_page=10):
-        self.page = max(page, 1)
+    def __init__(self, page=1, per_page=10, offset=None):
+        """
+        Args:
+            offset: Explicit first row, e.g. the `next_offset` of a page that
+                ended early; takes precedence over `page`.
+        """
         self.per_page = max(per_page, 1)
+        if offset is not None:
+            self._offset = max(offset, 0)
+            self.page = self._offset // self.per_page + 1
+        else:
+            self.page = max(page, 1)
+            self._offset = (self.page - 1) * self.per_page
         self.total = 0
 
+    @property
+    def offset(self):
+        return self._offset
+
     def paginate(self, records):
-        start = (self.page - 1) * self.per_page
+        start = self.offset
         end = start + self.per_page
         return records[start:end]
 
-    def to_response(self, records_count):
+    def to_response(
+        self, records_count, has_more=None, count_mode="exact", returned=None
+    ):
+        """
+        Args:
+            records_count: Total number of records, exact or estimated, or None
+                when not counted (`count_mode` "none").
+            has_more: Whether a next page exists, computed from
+                `records_count` when not given.
+            count_mode: One of `COUNT_MODES`.
+            returned: Number of records of the page, when it ended before
+                `per_page` records.
+        """
         self.total = records_count
+        if returned is None:
+            returned = self.per_page
+        if has_more is None:
+            end = self.offset + returned
+            has_more = records_count is not None and records_count > end
+        total_pages = None
+        if records_count is not None:
+            total_pages = (records_count // self.per_page) + (
+                1 if records_count % self.per_page else 0
+            )
         return {
             "page": self.page,
             "per_page": self.per_page,
-            "total_records": self.total,
-            "total_pages": (self.total // self.per_page)
-            + (1 if self.total % self.per_page else 0),
+            "total_records": records_count,
+            "total_pages": total_pages,
+            "has_more": has_more,
+            "next_offset": self.offset + returned if has_more else None,
+            "truncated": returned < self.per_page and has_more,
+            "count": count_mode,
         }
+
+
+def read_chunked(
+    records, field_list: List[str], chunk_size: int, max_bytes: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Read and serialize `records` by chunks of `chunk_size` ids, evicting each
+    chunk from the ORM cache once read so that it never holds more than one.
+
+    Once the estimated size of the rows exceeds `max_bytes` (when set), the
+    remaining chunks are not read; the first chunk is always read.
+    """
+    ids = records.ids
+    rows = []
+    size = 0
+    for start in range(0, len(ids), chunk_size):
+        # A fresh recordset, so that prefetching stays within the chunk
+        chunk_records = records.browse(ids[start : start + chunk_size])
+        chunk = read_rows(chunk_records, field_list)
+        chunk_records.invalidate_recordset()
+        rows.extend(chunk)
+        if max_bytes:
+            size += estimate_size(chunk)
+            if size >= max_bytes:
+                break
+    return rows
+
+
+def estimate_size(rows: List[Dict[str, Any]]) -> int:
+    """
+    Estimated JSON size of `rows`, extrapolated from the encoding of at most
+    `SIZE_SAMPLE_ROWS` rows spread over the list, so that the page is not
+    encoded twice.
+    """
+    if not rows:
+        return 0
+    sample = rows[:: max(1, len(rows) // SIZE_SAMPLE_ROWS)]
+    return len(dumps_bytes(sample)) * len(rows) // len(sample)
+
+
+def estimate_count(model, domain) -> int:
+    """
+    Planner estimate of the number of records of `model` matching `domain`,
+    from the table statistics (`pg_class.reltuples` and column histograms),
+    without running the query.
+    """
+    query = model._search(domain)
+    model.env.cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query.select()))
+    plan = model.env.cr.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,95 @@
+import logging
+from contextlib import contextmanager
+
+from odoo import api, SUPERUSER_ID
+from odoo.http import request
+from odoo.sql_db import db_connect
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Default maximum replication lag, in seconds, above which reads stay on the
+# primary
+DEFAULT_MAX_LAG = 5.0
+
+_REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+"""
+
+
+def _has_pending_writes(env) -> bool:
+    """
+    Whether the current transaction on the primary wrote anything, in which
+    case a replica would not see those writes yet.
+    """
+    env.flush_all()
+    env.cr.execute("SELECT txid_current_if_assigned() IS NOT NULL")
+    return env.cr.fetchone()[0]
+
+
+def _max_lag() -> float:
+    try:
+        return float(config.get("akm_replica_max_lag") or DEFAULT_MAX_LAG)
+    except ValueError:
+        return DEFAULT_MAX_LAG
+
+
+@contextmanager
+def read_only_env(env):
+    """
+    Yield a superuser environment to run the reads of an API request on.
+
+    When `akm_replica_dsn` is set in the Odoo configuration file (e.g.
+    `postgresql://odoo@replica:5432/<same database name>`), the environment
+    runs in a read-only transaction on that replica. It falls back to `env`,
+    the primary, when:
+
+    - the replica is unreachable or its database name differs from the primary's,
+    - the current transaction already wrote on the primary (read-your-writes),
+    - the replica lags more than `akm_replica_max_lag` seconds (default 5).
+
+    Args:
+        env: Environment of the request, on the primary.
+    """
+    dsn = config.get("akm_replica_dsn")
+    if not dsn or _has_pending_writes(env):
+        yield env.sudo()
+        return
+
+    try:
+        cr = db_connect(dsn, allow_uri=True).cursor()
+    except Exception:
+        _logger.warning("Replica unreachable, reading from the primary", exc_info=True)
+        yield env.sudo()
+        return
+
+    try:
+        if cr.dbname != env.cr.dbname:
+            _logger.warning(
+                "Replica database %r differs from %r, reading from the primary",
+                cr.dbname,
+                env.cr.dbname,
+            )
+            replica_env = None
+        else:
+            cr.execute("SET TRANSACTION READ ONLY")
+            cr.execute(_REPLICA_LAG_QUERY)
+            lag = cr.fetchone()[0]
+            replica_env = (
+                api.Environment(cr, SUPERUSER_ID, {}) if lag <= _max_lag() else None
+            )
+
+        if replica_env is None:
+            yield env.sudo()
+        else:
+            if request:
+                request.akm_replica_read = True
+            yield replica_env
+    finally:
+        cr.close()
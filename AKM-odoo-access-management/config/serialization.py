@@ -0,0 +1,185 @@
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from odoo import fields, models
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional, faster backend
+    orjson = None
+
+
+def _bytes_to_str(value: bytes) -> str:
+    return value.decode("utf-8", "replace")
+
+
+def _record_to_str(value: models.BaseModel) -> str:
+    return f"{value._name}{value._ids!r}"
+
+
+# Types returned as-is, they are natively supported by every JSON encoder
+_NATIVE_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# Exact type -> converter, checked before any isinstance() fallback
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    datetime: fields.Datetime.to_string,
+    date: fields.Date.to_string,
+    bytes: _bytes_to_str,
+    bytearray: _bytes_to_str,
+    set: list,
+    frozenset: list,
+}
+
+# Field type -> converter for the values returned by `Model.read()`; the other
+# field types (char, integer, many2one tuples, x2many id lists...) are native
+_FIELD_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "datetime": fields.Datetime.to_string,
+    "date": fields.Date.to_string,
+    "binary": _bytes_to_str,
+    "image": _bytes_to_str,
+}
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Convert a value to JSON-native types (dict, list, str, numbers, None).
+
+    Dispatches on the exact type first, containers are walked, recordsets
+    become their `model(ids)` representation and unknown types their `str()`.
+
+    Args:
+        value (Any): The object to convert.
+
+    Returns:
+        Any: A JSON-serializable representation of the object.
+    """
+    value_type = type(value)
+    if value_type in _NATIVE_TYPES:
+        return value
+    converter = _CONVERTERS.get(value_type)
+    if converter is not None:
+        return converter(value)
+    if value_type is dict:
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if value_type is list or value_type is tuple:
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, models.BaseModel):
+        return _record_to_str(value)
+    if isinstance(value, Mapping):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    for base, converter in _CONVERTERS.items():
+        if isinstance(value, base):
+            return converter(value)
+    return str(value)
+
+
+def serialize_rows(
+    rows: List[Dict[str, Any]], model_fields: Mapping[str, fields.Field]
+) -> List[Dict[str, Any]]:
+    """
+    Convert the rows returned by `Model.read()` to JSON-native values in place.
+
+    Only the columns whose field type needs a conversion (datetime, date,
+    binary) are visited, so the encoder never has to fall back on a `default`
+    hook.
+
+    Args:
+        rows (list): Rows as returned by `read()`.
+        model_fields (Mapping): The model's `_fields`.
+
+    Returns:
+        list: The same rows.
+    """
+    if not rows:
+        return rows
+    columns = [
+        (name, _FIELD_CONVERTERS[model_fields[name].type])
+        for name in rows[0]
+        if name in model_fields and model_fields[name].type in _FIELD_CONVERTERS
+    ]
+    if not columns:
+        return rows
+    for row in rows:
+        for name, converter in columns:
+            value = row[name]
+            if value:
+                row[name] = converter(value)
+    return rows
+
+
+def _orjson_default(value: Any) -> Any:
+    converted = to_jsonable(value)
+    if converted is value:
+        raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+    return converted
+
+
+def dumps(value: Any) -> str:
+    """
+    Encode `value` to a compact JSON string.
+
+    Uses orjson when it is installed, the standard library otherwise; both
+    render dates the way Odoo does ("YYYY-MM-DD HH:MM:SS").
+    """
+    return dumps_bytes(value).decode("utf-8")
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Same as `dumps` but returns UTF-8 encoded bytes."""
+    if orjson is not None:
+        return orjson.dumps(
+            value,
+            default=_orjson_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        value, default=to_jsonable, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def to_columnar(
+    rows: List[Dict[str, Any]],
+    model_fields: Mapping[str, fields.Field],
+    field_names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Reshape `read()` rows into a field header plus one array per row.
+
+    Many2one values `(id, display_name)` are dictionary-encoded: rows only
+    hold the id and each display name is sent once under `relations`.
+
+    Args:
+        rows (list): Serialized rows as returned by `serialize_rows`.
+        model_fields (Mapping): The model's `_fields`.
+        field_names (list, optional): Header to use when there are no rows.
+
+    Returns:
+        dict: {"fields": [...], "rows": [[...], ...], "relations": {field: {id: name}}}
+    """
+    if not rows:
+        return {"fields": list(field_names or []), "rows": [], "relations": {}}
+
+    field_names = list(rows[0])
+    many2one_names = [
+        name
+        for name in field_names
+        if name in model_fields and model_fields[name].type == "many2one"
+    ]
+    relations = {name: {} for name in many2one_names}
+    values = [[row[name] for name in field_names] for row in rows]
+
+    for name in many2one_names:
+        index = field_names.index(name)
+        names_by_id = relations[name]
+        for row_values in values:
+            value = row_values[index]
+            if value:
+                names_by_id[value[0]] = value[1]
+                row_values[index] = value[0]
+            else:
+                row_values[index] = None
+
+    return {"fields": field_names, "rows": values, "relations": relations}
@@ -0,0 +1,95 @@
+import heapq
+import itertools
+import json
+import threading
+from typing import Dict, List, Tuple
+
+# Longest statement text kept for the slowest-queries report
+MAX_QUERY_LENGTH = 500
+
+
+class SQLProfiler:
+    """
+    Counts the queries executed on a cursor and the time spent in them.
+
+    Relies on the `query_hooks` that `odoo.sql_db.Cursor.execute` calls for the
+    current thread, so nothing is patched and only the given cursor is measured.
+    Optionally keeps the `top_n` slowest statements (without their parameters).
+
+    Usage:
+        with SQLProfiler(request.env.cr, top_n=5) as profiler:
+            ...
+        profiler.count, profiler.duration, profiler.slowest()
+    """
+
+    def __init__(self, cr, top_n: int = 0):
+        self.cr = cr
+        self.top_n = max(top_n, 0)
+        self.count = 0
+        self.duration = 0.0
+        self._slowest: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+
+    def _hook(self, cr, query, params, start, delay):
+        if cr is not self.cr:
+            return
+        self.count += 1
+        self.duration += delay
+        if self.top_n:
+            if isinstance(query, bytes):
+                query = query.decode("utf-8", "replace")
+            item = (delay, next(self._sequence), query)
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, item)
+            elif delay > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def start(self):
+        thread = threading.current_thread()
+        hooks = getattr(thread, "query_hooks", None)
+        if hooks is None:
+            hooks = thread.query_hooks = []
+        hooks.append(self._hook)
+        return self
+
+    def stop(self):
+        hooks = getattr(threading.current_thread(), "query_hooks", [])
+        if self._hook in hooks:
+            hooks.remove(self._hook)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def slowest(self) -> List[Dict]:
+        """Return the captured statements, slowest first."""
+        return [
+            {"duration": delay, "query": query[:MAX_QUERY_LENGTH]}
+            for delay, _, query in sorted(self._slowest, reverse=True)
+        ]
+
+    def log_values(self) -> Dict:
+        """Map the collected statistics to their `akm.request.log` columns."""
+        return {
+            "sql_count": self.count,
+            "sql_duration": self.duration,
+            "sql_slowest": json.dumps(self.slowest()) if self.top_n else False,
+        }
+
+    def debug_header(self) -> str:
+        """
+        Render the statistics for the `X-AKM-SQL` debug header.
+
+        Returns:
+            str: e.g. "count=12; time=8.4ms; slowest=3.1ms,2.0ms"
+        """
+        header = f"count={self.count}; time={self.duration * 1000:.1f}ms"
+        if self.top_n and self._slowest:
+            slowest = ",".join(
+                f"{delay * 1000:.1f}ms"
+                for delay, _, _ in sorted(self._slowest, reverse=True)
+            )
+            header += f"; slowest={slowest}"
+        return header
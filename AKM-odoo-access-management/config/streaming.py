@@ -0,0 +1,167 @@
+import hashlib
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from odoo.http import Response
+
+from .compression import iter_compress, negotiate_encoding
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class Segment:
+    """
+    A piece of a streamed download: a file on disk, or bytes when the
+    attachment is stored in the database.
+    """
+
+    def __init__(self, size: int, path: Optional[str] = None, data: bytes = b""):
+        self.size = size
+        self.path = path
+        self.data = data
+
+    @classmethod
+    def from_attachment(cls, attachment) -> "Segment":
+        if attachment.store_fname:
+            return cls(
+                attachment.file_size,
+                path=attachment._full_path(attachment.store_fname),
+            )
+        data = attachment.raw or b""
+        return cls(len(data), data=data)
+
+    def iter_bytes(self, start: int, stop: int) -> Iterator[bytes]:
+        """Yield the bytes in `[start, stop)` of the segment."""
+        if self.path is None:
+            for offset in range(start, stop, STREAM_CHUNK_SIZE):
+                yield self.data[offset : min(offset + STREAM_CHUNK_SIZE, stop)]
+            return
+        with open(self.path, "rb") as segment_file:
+            segment_file.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                chunk = segment_file.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+def iter_segments(segments: List[Segment], start: int, stop: int) -> Iterator[bytes]:
+    """
+    Yield the bytes in `[start, stop)` of the concatenation of `segments`,
+    seeking directly into the first segment concerned.
+    """
+    offset = 0
+    for segment in segments:
+        segment_start, segment_stop = offset, offset + segment.size
+        offset = segment_stop
+        if segment_stop <= start:
+            continue
+        if segment_start >= stop:
+            break
+        yield from segment.iter_bytes(
+            max(start, segment_start) - segment_start,
+            min(stop, segment_stop) - segment_start,
+        )
+
+
+def make_etag(parts: Iterable[str]) -> str:
+    """Build a strong ETag from the checksums of the parts of a download."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _requested_range(httprequest, size: int, etag: str) -> Optional[Tuple[int, int]]:
+    """
+    Return the `(start, stop)` byte range asked for by the client, None for the
+    whole content (no Range header, or an `If-Range` that no longer matches).
+
+    Raises:
+        ValueError: If the range cannot be satisfied.
+    """
+    byte_range = httprequest.range
+    if byte_range is None or len(byte_range.ranges) != 1:
+        # Multipart ranges are not supported, the whole content is sent instead
+        return None
+    if_range = httprequest.if_range
+    if if_range and if_range.etag and if_range.etag != etag:
+        return None
+    requested = byte_range.range_for_length(size)
+    if requested is None:
+        raise ValueError("Requested range not satisfiable")
+    return requested
+
+
+def stream_segments(
+    httprequest,
+    segments: List[Segment],
+    etag: str,
+    content_type: str,
+    filename: Optional[str] = None,
+    allow_compression: bool = True,
+) -> Response:
+    """
+    Stream segments as one download, with `Range`, `If-Range`,
+    `If-None-Match` support and compression of full downloads.
+
+    Args:
+        httprequest: The werkzeug request.
+        segments (list): Parts of the content, in order.
+        etag (str): Strong validator of the content.
+        content_type (str): MIME type of the content.
+        filename (str, optional): Sent in `Content-Disposition`.
+        allow_compression (bool): Whether full downloads may be compressed.
+
+    Returns:
+        Response: A streamed 200, 206, 304 or 416 response.
+    """
+    size = sum(segment.size for segment in segments)
+    headers = [
+        ("Content-Type", content_type),
+        ("Accept-Ranges", "bytes"),
+    ]
+    if filename:
+        headers.append(("Content-Disposition", f'attachment; filename="{filename}"'))
+
+    encoding = None
+    if allow_compression and not httprequest.range:
+        encoding = negotiate_encoding(httprequest.accept_encodings)
+    # Each encoding of the content is a distinct representation
+    variant_etag = f"{etag}-{encoding}" if encoding else etag
+    headers.append(("ETag", f'"{variant_etag}"'))
+
+    if httprequest.if_none_match.contains(variant_etag):
+        return Response(status=304, headers=headers)
+
+    try:
+        requested = _requested_range(httprequest, size, etag)
+    except ValueError:
+        return Response(
+            status=416, headers=headers + [("Content-Range", f"bytes */{size}")]
+        )
+
+    if requested is not None:
+        start, stop = requested
+        headers += [
+            ("Content-Range", f"bytes {start}-{stop - 1}/{size}"),
+            ("Content-Length", str(stop - start)),
+        ]
+        return Response(
+            iter_segments(segments, start, stop),
+            status=206,
+            headers=headers,
+            direct_passthrough=True,
+        )
+
+    body = iter_segments(segments, 0, size)
+    headers.append(("Vary", "Accept-Encoding"))
+    if encoding:
+        # Ranges always refer to the identity encoding, only full downloads
+        # are compressed
+        body = iter_compress(body, encoding)
+        headers.append(("Content-Encoding", encoding))
+    else:
+        headers.append(("Content-Length", str(size)))
+    return Response(body, status=200, headers=headers, direct_passthrough=True)
@@ -0,0 +1,90 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict
+
+from odoo.http import request
+
+# Phases that have a dedicated numeric column on `akm.request.log`
+PHASE_LOG_FIELDS = {
+    "auth": "auth_duration",
+    "permission": "permission_duration",
+    "search": "search_duration",
+    "read": "read_duration",
+    "serialize": "serialize_duration",
+}
+
+
+class PhaseTimer:
+    """
+    Accumulates wall-clock time spent in the named phases of a request.
+
+    A phase may be entered several times, durations are summed.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def server_timing(self, total: float) -> str:
+        """
+        Render the phases as a `Server-Timing` header value (milliseconds).
+
+        Args:
+            total (float): Total request duration in seconds.
+
+        Returns:
+            str: e.g. "auth;dur=1.2, search;dur=30.5, total;dur=40.1"
+        """
+        metrics = [
+            f"{name};dur={secs * 1000:.1f}" for name, secs in self.phases.items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def log_values(self) -> Dict[str, float]:
+        """Map the collected phases to their `akm.request.log` columns."""
+        return {
+            PHASE_LOG_FIELDS[name]: secs
+            for name, secs in self.phases.items()
+            if name in PHASE_LOG_FIELDS
+        }
+
+
+class NullTimer:
+    """
+    Stand-in used when phase timing is disabled, every call is a no-op.
+    """
+
+    enabled = False
+    phases: Dict[str, float] = {}
+
+    _context = nullcontext()
+
+    def phase(self, name: str):
+        return self._context
+
+    def server_timing(self, total: float) -> str:
+        return ""
+
+    def log_values(self) -> Dict[str, float]:
+        return {}
+
+
+NULL_TIMER = NullTimer()
+
+
+def current_timer():
+    """
+    Return the timer of the request being served, or the shared no-op timer
+    when timing is disabled or called outside of `@log_request`.
+    """
+    return getattr(request, "akm_timer", NULL_TIMER) if request else NULL_TIMER
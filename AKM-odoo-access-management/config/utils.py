@@ -1,12 +1,55 @@
+import ipaddress
+import socket
 from datetime import datetime, timezone
-from odoo import models
-from typing import Any
+from typing import Any, Collection, Optional
+from urllib.parse import urlparse
+
+from .serialization import to_jsonable
 
 
 def get_current_utc_datetime():
     return datetime.now(timezone.utc)
 
 
+def get_config_flag(env, key: str) -> bool:
+    """
+    Read a boolean `ir.config_parameter`.
+
+    Args:
+        env: Odoo environment.
+        key (str): The parameter key.
+
+    Returns:
+        bool: True if the parameter is set to a truthy value ("1", "true", ...).
+    """
+    value = env["ir.config_parameter"].sudo().get_param(key, "")
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_config_int(env, key: str, default: int) -> int:
+    """
+    Read an integer `ir.config_parameter`, falling back to `default` when the
+    parameter is missing or invalid.
+    """
+    value = env["ir.config_parameter"].sudo().get_param(key)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def get_config_float(env, key: str, default: float) -> float:
+    """
+    Read a float `ir.config_parameter`, falling back to `default` when the
+    parameter is missing or invalid.
+    """
+    value = env["ir.config_parameter"].sudo().get_param(key)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
 def validate_http4_url(url: str) -> bool:
     """
     Validate the given URL.
@@ -26,9 +69,66 @@ def validate_http4_url(url: str) -> bool:
         return False
 
 
+def validate_public_url(url: str, allowed_hosts: Collection[str] = ()) -> bool:
+    """
+    Validate a URL the server will send requests to on behalf of a client:
+    HTTP or HTTPS, and a host that only resolves to public addresses, unless it
+    is in `allowed_hosts`.
+
+    Args:
+        url (str): The URL to validate.
+        allowed_hosts (Collection[str]): Lowercase hosts exempt from the
+            address check.
+
+    Returns:
+        bool: True if valid, False otherwise.
+    """
+    return resolve_public_address(url, allowed_hosts) is not None
+
+
+def resolve_public_address(
+    url: str, allowed_hosts: Collection[str] = ()
+) -> Optional[str]:
+    """
+    Resolve the host of `url` once and vet its addresses, see
+    `validate_public_url`. Requests must then be sent to the returned address:
+    resolving the host again could give another one (DNS rebinding).
+
+    Returns:
+        str or None: An IP address of the host, None if the URL is not valid.
+    """
+    try:
+        result = urlparse(url)
+        host = result.hostname
+        port = result.port
+    except (TypeError, ValueError):
+        return None
+    if result.scheme not in ("http", "https") or not host:
+        return None
+    default_port = 443 if result.scheme == "https" else 80
+    try:
+        addresses = socket.getaddrinfo(
+            host, port or default_port, proto=socket.IPPROTO_TCP
+        )
+    except (OSError, UnicodeError):
+        return None
+    if not addresses:
+        return None
+    if host.lower() not in allowed_hosts:
+        for *_, sockaddr in addresses:
+            address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+            if getattr(address, "ipv4_mapped", None):
+                address = address.ipv4_mapped
+            if not address.is_global or address.is_multicast:
+                return None
+    return addresses[0][4][0]
+
+
 def make_serializable(obj: Any) -> Any:
     """
-    Recursively convert objects to serializable formats.
+    Convert objects to serializable formats.
+
+    Kept for backward compatibility, see `serialization.to_jsonable`.
 
     Args:
         obj (Any): The object to serialize.
@@ -36,13 +136,4 @@ def make_serializable(obj: Any) -> Any:
     Returns:
         Any: A JSON-serializable representation of the object.
     """
-    if isinstance(obj, dict):
-        return {k: make_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [make_serializable(item) for item in obj]
-    elif isinstance(obj, models.Model):
-        return str(obj)  # or obj.id if preferred
-    elif isinstance(obj, (str, int, float, bool)) or obj is None:
-        return obj
-    else:
-        return str(obj)
+    return to_jsonable(obj)
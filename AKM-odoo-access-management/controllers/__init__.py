@@ -1,3 +1,6 @@
 from . import akm_oauth2
 from . import akm_permissions
 from . import akm_records
+from . import akm_metrics
+from . import akm_exports
+from . import akm_webhooks
@@ -0,0 +1,195 @@
+from odoo import http
+from odoo.http import request
+from odoo.models import Model
+
+from typing import Dict, Optional, Any
+
+from ..config.response import APIResponse
+from ..config.constants import API_PREFIX
+from ..config.decorators import (
+    json_error_response,
+    log_request,
+    require_authenticated_client,
+)
+from ..config.streaming import stream_segments
+from .akm_request_validation import AkmRequestValidationMixin, JsonDict
+
+
+class AkmExportsController(AkmRequestValidationMixin, http.Controller):
+    """
+    Asynchronous Export Controller
+
+    Long exports do not fit in one HTTP request. A client submits the query,
+    a cron builds the result as chunked attachments, the client polls the job
+    status and downloads the result, resuming with HTTP Range if needed.
+
+    Endpoints:
+    - POST /exports: Submit an export job
+    - GET /exports/<job_id>: Job status
+    - GET /exports/<job_id>/download: Result as NDJSON (Range supported)
+    """
+
+    @http.route(
+        f"{API_PREFIX}/exports", type="json", auth="none", methods=["POST"], csrf=False
+    )
+    @log_request
+    @require_authenticated_client
+    def submit(self, **kwargs: Dict[str, Any]) -> JsonDict:
+        """
+        Submit an Export Job
+
+        Request:
+            {
+                "model_name": "res.partner",
+                "fields": "name,email",
+                "date_time_gte": "2024-01-01 00:00:00",
+                "date_time_lte": "2024-01-31 23:59:59",
+                "targetted_datetime_field": "write_date"
+            }
+
+        Response (202):
+            {
+                "job_id": 7,
+                "state": "queued",
+                ...
+            }
+
+        Errors:
+            - MISSING_PARAMETER (400), ACCESS_DENIED (403), FIELD_ACCESS_DENIED (403)
+            - INVALID_DATETIME_PARAMS / INVALID_DATETIME_FORMAT (400)
+        """
+        client: Optional[Model] = kwargs.get("client")
+        if error := self._validate_client(client):
+            return error
+
+        model_name = kwargs.get("model_name")
+        if error := self._validate_model_access(client, model_name):
+            return error
+
+        error, domain = self._validate_datetime_params(
+            client,
+            model_name,
+            kwargs.get("date_time_gte"),
+            kwargs.get("date_time_lte"),
+            kwargs.get("targetted_datetime_field"),
+        )
+        if error:
+            return error
+
+        datetime_filter = bool(domain)
+        fields_param = kwargs.get("fields", "*")
+        error, _ = self._get_permitted_fields(client, model_name, fields_param)
+        if error:
+            return error
+
+        job = (
+            request.env["akm.export.job"]
+            .sudo()
+            .create(
+                {
+                    "client_id": client.id,
+                    "model_name": model_name,
+                    "field_names": "" if fields_param == "*" else fields_param,
+                    "targetted_datetime_field": datetime_filter
+                    and kwargs.get("targetted_datetime_field"),
+                    "date_time_gte": datetime_filter and kwargs.get("date_time_gte"),
+                    "date_time_lte": datetime_filter and kwargs.get("date_time_lte"),
+                    "state": "queued",
+                }
+            )
+        )
+        return APIResponse.success(
+            data=job._get_status(),
+            message="Export job queued",
+            status_code=202,
+        )
+
+    @http.route(
+        f"{API_PREFIX}/exports/<int:job_id>",
+        type="json",
+        auth="none",
+        methods=["GET"],
+        csrf=False,
+    )
+    @log_request
+    @require_authenticated_client
+    def status(self, job_id: int, **kwargs: Dict[str, Any]) -> JsonDict:
+        """
+        Export Job Status
+
+        Response:
+            {
+                "job_id": 7,
+                "state": "done",
+                "record_count": 120000,
+                "size": 48123456,
+                "chunks": 3,
+                "download_url": "/{MODULE}/v1/exports/7/download"
+            }
+
+        Errors:
+            - EXPORT_NOT_FOUND (404): Unknown job or job of another client
+        """
+        job, error = self._get_client_job(kwargs.get("client"), job_id)
+        if error:
+            return error
+        return APIResponse.success(data=job._get_status())
+
+    @http.route(
+        f"{API_PREFIX}/exports/<int:job_id>/download",
+        type="http",
+        auth="none",
+        methods=["GET"],
+        csrf=False,
+    )
+    @log_request
+    @json_error_response
+    @require_authenticated_client
+    def download(self, job_id: int, **kwargs: Dict[str, Any]):
+        """
+        Download an Export Result
+
+        Streams the chunk files of the job as one newline-delimited JSON
+        document, one record per line.
+
+        Supports `Range: bytes=<start>-` to resume an interrupted download
+        (`If-Range` with the ETag to make sure the result did not change) and
+        gzip/zstd compression of full downloads.
+
+        Errors:
+            - EXPORT_NOT_FOUND (404): Unknown job or job of another client
+            - EXPORT_NOT_READY (409): The job is not done yet
+        """
+        client = kwargs.get("client")
+        job, error = self._get_client_job(client, job_id)
+        if error:
+            return error
+        if job.state != "done":
+            return APIResponse.error(
+                message=f"Export job is {job.state}",
+                error_code="EXPORT_NOT_READY",
+                status_code=409,
+            )
+
+        segments, etag = job._get_download()
+        return stream_segments(
+            request.httprequest,
+            segments,
+            etag,
+            content_type="application/x-ndjson",
+            filename=f"export-{job.id}.jsonl",
+            allow_compression=request.akm_client_descriptor.allow_compression,
+        )
+
+    def _get_client_job(self, client: Optional[Model], job_id: int):
+        """Return the job if it belongs to the client, else an error response."""
+        if error := self._validate_client(client):
+            return None, error
+        job = request.env["akm.export.job"].sudo().browse(job_id).exists()
+        if not job or job.client_id != client:
+            return None, APIResponse.error(
+                message="Export job not found",
+                error_code="EXPORT_NOT_FOUND",
+                status_code=404,
+            )
+        return job, None
@@ -0,0 +1,50 @@
+import hmac
+
+from odoo import http
+from odoo.http import request
+from ..config import metrics
+from ..config.constants import API_PREFIX, METRICS_TOKEN_PARAM
+
+
+class AkmMetricsController(http.Controller):
+    """
+    Prometheus Metrics Controller
+
+    Exposes the request counters and latency histograms of all Odoo workers in
+    the Prometheus text exposition format, without querying `akm.request.log`.
+
+    Security Features:
+    - Disabled (404) until the `akm_oauth.metrics_token` system parameter is
+      set, scrapers must then send it as a Bearer token
+    """
+
+    @http.route(
+        f"{API_PREFIX}/metrics", type="http", auth="none", methods=["GET"], csrf=False
+    )
+    def metrics(self, **kwargs):
+        """
+        Prometheus Scrape Endpoint
+
+        Response:
+            text/plain; version=0.0.4
+
+            # TYPE akm_requests_total counter
+            akm_requests_total{client="3",endpoint="/.../v1/records",status="200"} 42.0
+            ...
+        """
+        token = request.env["ir.config_parameter"].sudo().get_param(METRICS_TOKEN_PARAM)
+        if not token:
+            # The metrics expose the client ids and their traffic
+            return request.make_response("Not Found", status=404)
+        auth_header = request.httprequest.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth_header, f"Bearer {token}"):
+            return request.make_response(
+                "Unauthorized",
+                headers=[("WWW-Authenticate", "Bearer")],
+                status=401,
+            )
+
+        return request.make_response(
+            metrics.render(),
+            headers=[("Content-Type", "text/plain; version=0.0.4; charset=utf-8")],
+        )
@@ -2,8 +2,10 @@
 from odoo import http
 from odoo.http import request
 from ..config.response import APIResponse
+from ..config.client_cache import get_client_by_client_id
 from ..config.constants import ACCESS_TOKEN_EXPIRY, API_PREFIX, MODULE_NAME
 from ..config.utils import validate_http4_url
+import hmac
 import secrets
 
 
@@ -292,24 +294,21 @@ class AkmOAuth2Controller(http.Controller):
         scope = params.get("scope", "read")
 
         # Validate client credentials
-        client = (
-            request.env["akm.oauth.client"]
-            .sudo()
-            .search(
-                [
-                    ("client_id", "=", client_id),
-                    ("client_secret", "=", client_secret),
-                    ("is_active", "=", True),
-                ],
-                limit=1,
+        descriptor = get_client_by_client_id(request.env, client_id)
+        if (
+            not descriptor
+            or not descriptor.is_active
+            or not isinstance(client_secret, str)
+            or not hmac.compare_digest(
+                descriptor.client_secret.encode(), client_secret.encode()
             )
-        )
-        if not client:
+        ):
             return APIResponse.error(
                 message="Invalid client credentials",
                 error_code="INVALID_CLIENT",
                 status_code=401,
             )
+        client = request.env["akm.oauth.client"].sudo().browse(descriptor.id)
 
         # Handle authorization_code flow
         if grant_type == "authorization_code":
@@ -320,40 +319,32 @@ class AkmOAuth2Controller(http.Controller):
                     status_code=400,
                 )
 
-            # Authcode model object
-            AuthCode = request.env["akm.oauth.authcode"].sudo()
-            auth_code_rec = AuthCode.search(
-                [
-                    ("code", "=", code),
-                    ("client_id", "=", client.id),
-                    ("used", "=", False),
-                ],
-                limit=1,
-            )
-            if not auth_code_rec or auth_code_rec.is_expired():
+            # Validate Scope if it matches with client.scope
+            if scope != descriptor.scope:
                 return APIResponse.error(
-                    message="Invalid or expired authorization code",
+                    message=f"You are not allowed to request {scope}, allowed scope: {descriptor.scope}",
                     error_code="INVALID_GRANT",
                     status_code=400,
                 )
 
-            # Mark code used
-            auth_code_rec.used = True
-
-            # Validate Scope if it matches with client.scope
-            if scope != client.scope:
+            # Authcode model object, used codes are looked up too: a duplicate
+            # exchange within the replay window gets the same tokens
+            AuthCode = request.env["akm.oauth.authcode"].sudo()
+            auth_code_rec = AuthCode.search(
+                [("code", "=", code), ("client_id", "=", client.id)],
+                limit=1,
+            )
+            tokens = None
+            if auth_code_rec and not auth_code_rec.is_expired():
+                # Mark code used and create tokens
+                tokens = auth_code_rec.redeem(scope)
+            if not tokens:
                 return APIResponse.error(
-                    message=f"You are not allowed to request {scope}, allowed scope: {client.scope}",
+                    message="Invalid or expired authorization code",
                     error_code="INVALID_GRANT",
                     status_code=400,
                 )
 
-            # Create tokens
-            token_obj = request.env["akm.oauth.token"].sudo()
-            tokens = token_obj.create_token(
-                client=client, user_name=auth_code_rec.user_name, scope=scope
-            )
-
             # converr timedelta to seconds
             expires_in = ACCESS_TOKEN_EXPIRY.total_seconds()
             return APIResponse.success(
@@ -388,15 +379,17 @@ class AkmOAuth2Controller(http.Controller):
                 )
             )
 
-            if not token_record or not token_record.is_refresh_token_valid:
+            if not token_record:
                 return APIResponse.error(
                     message="Invalid or expired refresh token",
                     error_code="INVALID_GRANT",
                     status_code=400,
                 )
 
-            if not token_record.validate_refresh_token(
-                refresh_token, client.client_secret
+            # Revocation is checked by the rotation, a refresh token rotated
+            # within the replay window is still accepted
+            if not token_record._validate_signed_token(
+                refresh_token, descriptor.client_secret
             ):
                 return APIResponse.error(
                     message="Invalid refresh token",
@@ -406,14 +399,20 @@ class AkmOAuth2Controller(http.Controller):
 
             try:
                 new_token = token_record.rotate_refresh_token(token_record)
-                access_token = new_token.access_token
-                refresh_token = new_token.refresh_token
             except Exception as e:
                 return APIResponse.error(
                     message=str(e),
                     error_code="TOKEN_ROTATION_FAILED",
                     status_code=500,
                 )
+            if not new_token:
+                return APIResponse.error(
+                    message="Invalid or expired refresh token",
+                    error_code="INVALID_GRANT",
+                    status_code=400,
+                )
+            access_token = new_token.access_token
+            refresh_token = new_token.refresh_token
 
             expires_in = ACCESS_TOKEN_EXPIRY.total_seconds()
             return APIResponse.success(
@@ -3,6 +3,7 @@ from odoo.http import request
 from ..config.response import APIResponse
 from ..config.constants import API_PREFIX
 from ..config.decorators import require_authenticated_client, log_request
+from ..config.timing import current_timer
 
 
 class AkmPermissionsController(http.Controller):
@@ -89,48 +90,51 @@ class AkmPermissionsController(http.Controller):
                 },
             )
 
-        models_info = []
-        for permission in permissions:
-            model = permission.model_id.model
-            model_name = permission.model_id.name
-
-            try:
-                # Get all fields info first
-                model_fields = request.env[model].sudo().fields_get()
-
-                # Filter only permitted fields
-                permitted_field_names = permission.field_ids.mapped("name")
-
-                fields_info = []
-                for field_name in permitted_field_names:
-                    if field_name in model_fields:
-                        field_attrs = model_fields[field_name]
-                        fields_info.append(
-                            {
-                                "name": field_name,
-                                "type": field_attrs.get("type"),
-                                "required": field_attrs.get("required", False),
-                                "readonly": field_attrs.get("readonly", False),
-                                "string": field_attrs.get("string"),
-                                "relation": field_attrs.get("relation"),
-                                "selection": field_attrs.get("selection"),
-                            }
-                        )
-
-                models_info.append(
-                    {
-                        "model_name": model,
-                        "model_description": model_name,
-                        "fields": fields_info,
-                    }
-                )
-
-            except Exception as e:
-
-                return APIResponse.error(
-                    message="Error fetching model fields",
-                    error_code="FIELD_FETCH_ERROR",
-                    status_code=500,
-                )
+        with current_timer().phase("permission"):
+            models_info = []
+            for permission in permissions:
+                model = permission.model_id.model
+                model_name = permission.model_id.name
+
+                try:
+                    # Get all fields info first
+                    model_fields = request.env[
+                        "akm.client.permission"
+                    ]._get_field_schema(model)
+
+                    # Filter only permitted fields
+                    permitted_field_names = permission.field_ids.mapped("name")
+
+                    fields_info = []
+                    for field_name in permitted_field_names:
+                        if field_name in model_fields:
+                            field_attrs = model_fields[field_name]
+                            fields_info.append(
+                                {
+                                    "name": field_name,
+                                    "type": field_attrs.get("type"),
+                                    "required": field_attrs.get("required", False),
+                                    "readonly": field_attrs.get("readonly", False),
+                                    "string": field_attrs.get("string"),
+                                    "relation": field_attrs.get("relation"),
+                                    "selection": field_attrs.get("selection"),
+                                }
+                            )
+
+                    models_info.append(
+                        {
+                            "model_name": model,
+                            "model_description": model_name,
+                            "fields": fields_info,
+                        }
+                    )
+
+                except Exception as e:
+
+                    return APIResponse.error(
+                        message="Error fetching model fields",
+                        error_code="FIELD_FETCH_ERROR",
+                        status_code=500,
+                    )
 
         return APIResponse.success(data=models_info)
@@ -1,27 +1,52 @@
 from odoo import http
 from odoo.http import request
 from odoo.models import Model
-from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 
 import logging
-from datetime import datetime
-from typing import List, Dict, Optional, Any, Tuple, Literal
+from psycopg2.errors import QueryCanceled
+from typing import Dict, List, Optional, Any, Tuple
 
 from ..config.response import APIResponse
-from ..config.pagination import Pagination
-from ..config.constants import API_PREFIX
-from ..config.decorators import require_authenticated_client, log_request
-
-
-DomainOperator = Literal["=", ">=", "<="]
-DomainTuple = Tuple[str, DomainOperator, Any]
-Domain = List[DomainTuple]
-JsonDict = Dict[str, Any]
+from ..config.pagination import (
+    COUNT_MODES,
+    Pagination,
+    estimate_count,
+    read_chunked,
+)
+from ..config import metrics
+from ..config.constants import (
+    API_PREFIX,
+    RECORDS_BY_IDS_MAX,
+    RECORDS_CACHE_DEFAULT_TTL,
+    RECORDS_CACHE_MAX_ROWS,
+    RECORDS_CACHE_SIZE_PARAM,
+    RECORDS_CACHE_TTL_PARAM,
+    RECORDS_PAGE_DEFAULT_MAX_BYTES,
+    RECORDS_PAGE_MAX_BYTES_PARAM,
+    RECORDS_READ_CHUNK_SIZE,
+    RESULT_SESSION_MAX_IDS,
+)
+from ..config.admission import statement_timeout
+from ..config.decorators import (
+    json_error_response,
+    log_request,
+    require_authenticated_client,
+)
+from ..config.replica import read_only_env
+from ..config.result_cache import records_cache
+from ..config.binary_fields import get_content, is_binary
+from ..config.serialization import to_columnar
+from ..config.streaming import stream_segments
+from ..config.timing import current_timer
+from ..config.utils import get_config_int
+from .akm_request_validation import AkmRequestValidationMixin, Domain, JsonDict
+
+RECORDS_FORMATS = ("records", "columnar")
 
 _logger = logging.getLogger(__name__)
 
 
-class AkmRecordsController(http.Controller):
+class AkmRecordsController(AkmRequestValidationMixin, http.Controller):
     @http.route(
         f"{API_PREFIX}/records", type="json", auth="none", methods=["GET"], csrf=False
     )
@@ -30,6 +55,7 @@ class AkmRecordsController(http.Controller):
     def get(self, **kwargs: Dict[str, Any]) -> JsonDict:
         """Read records from a given model with pagination and filters."""
         client: Optional[Model] = kwargs.get("client")
+        timer = current_timer()
 
         # Validate client
         if error := self._validate_client(client):
@@ -42,214 +68,518 @@ class AkmRecordsController(http.Controller):
         self.kwargs = kwargs
         model_name = params.get("model_name")
 
-        if error := self._validate_model_access(client, model_name):
-
-            return error
-
-        # Validate datetime params and build domain
-        error, domain = self._validate_datetime_params(
-            client,
-            model_name,
-            params.get("date_time_gte"),
-            params.get("date_time_lte"),
-            params.get("targetted_datetime_field"),
-        )
+        with timer.phase("permission"):
+            error = self._validate_model_access(client, model_name)
+            if not error:
+                # Validate datetime params and build domain
+                error, domain = self._validate_datetime_params(
+                    client,
+                    model_name,
+                    params.get("date_time_gte"),
+                    params.get("date_time_lte"),
+                    params.get("targetted_datetime_field"),
+                )
         if error:
             return error
 
+        response_format = params.get("format", "records")
+        if response_format not in RECORDS_FORMATS:
+            return APIResponse.error(
+                message=f"Invalid format '{response_format}'",
+                error_code="INVALID_FORMAT",
+                status_code=400,
+                details={"allowed": list(RECORDS_FORMATS)},
+            )
+
+        count_mode = params.get("count", "exact")
+        if count_mode not in COUNT_MODES:
+            return APIResponse.error(
+                message=f"Invalid count '{count_mode}'",
+                error_code="INVALID_COUNT",
+                status_code=400,
+                details={"allowed": list(COUNT_MODES)},
+            )
+
         # Handle pagination
         page = int(params.get("page", 1))
         per_page = int(params.get("per_page", 10))
-        paginator = Pagination(page=page, per_page=per_page)
-
-        try:
-            ModelObj = request.env[model_name].sudo()
-            records = ModelObj.search(domain)
-            paginated_records = paginator.paginate(records)
-        except Exception as e:
-            _logger.error(f"Error reading data: {e}")
-
+        offset = params.get("offset")
+        if offset is not None and (
+            not isinstance(offset, int) or isinstance(offset, bool) or offset < 0
+        ):
             return APIResponse.error(
-                message="Error fetching records",
-                error_code="READ_ERROR",
-                status_code=500,
+                message="offset must be a positive integer",
+                error_code="INVALID_OFFSET",
+                status_code=400,
             )
+        paginator = Pagination(page=page, per_page=per_page, offset=offset)
+        if error := self._validate_per_page(paginator.per_page):
+            return error
 
         # Get permitted fields
-        error, field_list = self._get_permitted_fields(
-            client, model_name, kwargs.get("fields", "*")
-        )
+        with timer.phase("permission"):
+            error, field_list = self._get_permitted_fields(
+                client, model_name, kwargs.get("fields", "*")
+            )
         if error:
             return error
 
-        # Read records with permitted fields
-        res_data = [rec.read(field_list)[0] for rec in paginated_records]
-        pagination_info = paginator.to_response(records_count=len(records))
-
-        return APIResponse.success(
-            data={
-                "records": res_data,
-                "pagination": pagination_info,
-            }
+        # Result sessions: `"session": true` searches once and returns a token,
+        # the following pages pass the token and only read their slice of ids
+        session_param = params.get("session") or None
+        session = None
+        if session_param is not None and session_param is not True:
+            error, session = self._get_session(client, model_name, session_param)
+            if error:
+                return error
+
+        # Repeated polls are served from the result cache, without search nor
+        # read, as long as the model did not change since
+        cache_size = 0
+        if session_param is None:
+            cache_size = get_config_int(request.env, RECORDS_CACHE_SIZE_PARAM, 0)
+        if cache_size > 0:
+            cache_key = (
+                request.env.cr.dbname,
+                client.id,
+                request.akm_client_descriptor.permission_version,
+                model_name,
+                tuple(tuple(leaf) for leaf in domain),
+                tuple(field_list),
+                paginator.offset,
+                paginator.per_page,
+                response_format,
+                count_mode,
+            )
+            version = request.env["akm.model.version"]._get_version(model_name)
+            data = records_cache.get(cache_key, version)
+            metrics.count_cache("miss" if data is None else "hit")
+            request.future_response.headers["X-AKM-Cache"] = (
+                "MISS" if data is None else "HIT"
+            )
+            if data is not None:
+                return APIResponse.success(data=data)
+
+        if error := self._admit_heavy_request():
+            return error
+
+        max_bytes = get_config_int(
+            request.env, RECORDS_PAGE_MAX_BYTES_PARAM, RECORDS_PAGE_DEFAULT_MAX_BYTES
         )
 
-    def _validate_datetime(self, date_str: str) -> bool:
-        """Validate datetime string format."""
+        # Permissions are checked on the primary, the records may be read on
+        # the replica
+        timeout = request.akm_client_descriptor.statement_timeout_ms
         try:
-            datetime.strptime(date_str, DEFAULT_SERVER_DATETIME_FORMAT)
-            return True
-        except ValueError:
-            return False
+            with (
+                read_only_env(request.env) as read_env,
+                statement_timeout(read_env.cr, timeout),
+            ):
+                if cache_size > 0 and read_env.cr is not request.env.cr:
+                    # The version of the replica snapshot the page is read
+                    # from, which may be older than the primary's
+                    version = read_env["akm.model.version"]._get_version(model_name)
+                if session_param is None:
+                    response = self._read_page(
+                        read_env,
+                        model_name,
+                        domain,
+                        field_list,
+                        paginator,
+                        response_format,
+                        count_mode,
+                        max_bytes,
+                    )
+                else:
+                    if session:
+                        ids = session._get_ids()
+                    else:
+                        with timer.phase("search"):
+                            ids = (
+                                read_env[model_name]
+                                .sudo()
+                                .search(domain, limit=RESULT_SESSION_MAX_IDS + 1)
+                                .ids
+                            )
+                        if len(ids) > RESULT_SESSION_MAX_IDS:
+                            return APIResponse.error(
+                                message=f"Result sessions are limited to "
+                                f"{RESULT_SESSION_MAX_IDS} records, narrow the "
+                                "date range",
+                                error_code="SESSION_TOO_LARGE",
+                                status_code=400,
+                                details={"max_records": RESULT_SESSION_MAX_IDS},
+                            )
+                    response = self._read_ids_page(
+                        read_env,
+                        model_name,
+                        ids,
+                        field_list,
+                        paginator,
+                        response_format,
+                        max_bytes,
+                    )
+        except QueryCanceled:
+            return self._query_timeout_error()
+
+        if session_param is not None:
+            if not session:
+                session = (
+                    request.env["akm.result.session"]
+                    .sudo()
+                    ._create_session(client, model_name, ids)
+                )
+            response["data"]["pagination"].update(session._get_info())
+            return response
+
+        if (
+            cache_size > 0
+            and response["status"] == "success"
+            and paginator.per_page <= RECORDS_CACHE_MAX_ROWS
+        ):
+            ttl = get_config_int(
+                request.env, RECORDS_CACHE_TTL_PARAM, RECORDS_CACHE_DEFAULT_TTL
+            )
+            records_cache.set(cache_key, version, response["data"], ttl, cache_size)
+        return response
+
+    @http.route(
+        f"{API_PREFIX}/records/by_ids",
+        type="json",
+        auth="none",
+        methods=["GET"],
+        csrf=False,
+    )
+    @log_request
+    @require_authenticated_client
+    def get_by_ids(self, **kwargs: Dict[str, Any]) -> JsonDict:
+        """
+        Read known records of a model by id, with the permitted fields.
+
+        The ids that do not exist (anymore) are returned in `missing_ids`.
+        """
+        client: Optional[Model] = kwargs.get("client")
+        timer = current_timer()
+
+        if error := self._validate_client(client):
+            return error
 
-    def _validate_client(self, client: Optional[Model]) -> Optional[JsonDict]:
-        """Validate client and its scope."""
-        if not client:
+        model_name = kwargs.get("model_name")
+        with timer.phase("permission"):
+            error = self._validate_model_access(client, model_name)
+        if error:
+            return error
+
+        error, ids = self._validate_ids(kwargs.get("ids"))
+        if error:
+            return error
 
+        response_format = kwargs.get("format", "records")
+        if response_format not in RECORDS_FORMATS:
             return APIResponse.error(
-                message="Client not found",
-                error_code="INVALID_CLIENT",
-                status_code=401,
+                message=f"Invalid format '{response_format}'",
+                error_code="INVALID_FORMAT",
+                status_code=400,
+                details={"allowed": list(RECORDS_FORMATS)},
+            )
+
+        with timer.phase("permission"):
+            error, field_list = self._get_permitted_fields(
+                client, model_name, kwargs.get("fields", "*")
+            )
+        if error:
+            return error
+
+        if error := self._admit_heavy_request():
+            return error
+
+        timeout = request.akm_client_descriptor.statement_timeout_ms
+        try:
+            with (
+                read_only_env(request.env) as read_env,
+                statement_timeout(read_env.cr, timeout),
+            ):
+                ModelObj = read_env[model_name].sudo()
+                with timer.phase("search"):
+                    records = ModelObj.browse(ids).exists()
+                with timer.phase("read"):
+                    res_data = read_chunked(
+                        records,
+                        field_list,
+                        RECORDS_READ_CHUNK_SIZE,
+                        get_config_int(
+                            request.env,
+                            RECORDS_PAGE_MAX_BYTES_PARAM,
+                            RECORDS_PAGE_DEFAULT_MAX_BYTES,
+                        ),
+                    )
+        except QueryCanceled:
+            return self._query_timeout_error()
+
+        with timer.phase("serialize"):
+            found = set(records.ids)
+            unread = records.ids[len(res_data) :]
+            if response_format == "columnar":
+                res_data = to_columnar(res_data, ModelObj._fields, field_list)
+            return APIResponse.success(
+                data={
+                    "records": res_data,
+                    "missing_ids": [
+                        record_id for record_id in ids if record_id not in found
+                    ],
+                    "unread_ids": unread,
+                }
             )
 
-        if client.scope not in ("read", "write", "admin"):
+    @http.route(
+        f"{API_PREFIX}/records/<string:model_name>/<int:record_id>/<string:field_name>",
+        type="http",
+        auth="none",
+        methods=["GET"],
+        csrf=False,
+    )
+    @log_request
+    @json_error_response
+    @require_authenticated_client
+    def get_field_content(
+        self, model_name: str, record_id: int, field_name: str, **kwargs: Any
+    ):
+        """
+        Download the content of a binary field, the `url` that `/records`,
+        `/records/by_ids` and exports return instead of inlining it.
+
+        Supports `Range`, `If-Range` and `If-None-Match`.
+
+        Errors:
+            - ACCESS_DENIED (403), FIELD_ACCESS_DENIED (403)
+            - INVALID_FIELD_TYPE (400): The field is not binary
+            - RECORD_NOT_FOUND (404), CONTENT_NOT_FOUND (404): Empty field
+        """
+        client: Optional[Model] = kwargs.get("client")
+        if error := self._validate_client(client):
+            return error
+        if error := self._validate_model_access(client, model_name):
+            return error
+        if not client.can_access_field(model_name, field_name):
             return APIResponse.error(
-                message="Client scope invalid",
-                error_code="INVALID_SCOPE",
+                message=f"Field '{field_name}' not accessible",
+                error_code="FIELD_ACCESS_DENIED",
                 status_code=403,
             )
-        return None
 
-    def _validate_model_access(
-        self, client: Model, model_name: Optional[str]
-    ) -> Optional[JsonDict]:
-        """Validate model name and access."""
-        if not model_name:
+        ModelObj = request.env[model_name].sudo()
+        field = ModelObj._fields.get(field_name)
+        if field is None or not is_binary(field):
             return APIResponse.error(
-                message="No model_name provided",
-                error_code="MISSING_PARAMETER",
+                message=f"Field '{field_name}' is not a binary field",
+                error_code="INVALID_FIELD_TYPE",
                 status_code=400,
             )
 
-        if not client.can_access_model(model_name):
+        record = ModelObj.browse(record_id).exists()
+        if not record:
             return APIResponse.error(
-                message=f"Model '{model_name}' not accessible for this client",
-                error_code="ACCESS_DENIED",
-                status_code=403,
+                message=f"Record {record_id} not found",
+                error_code="RECORD_NOT_FOUND",
+                status_code=404,
             )
-        return None
 
-    def _validate_datetime_params(
-        self,
-        client: Model,
-        model_name: str,
-        date_time_gte: Optional[str],
-        date_time_lte: Optional[str],
-        targetted_datetime_field: Optional[str],
-    ) -> Tuple[Optional[JsonDict], Optional[Domain]]:
-        """Validate datetime parameters and return domain if valid."""
-        domain = []
-
-        if any([date_time_gte, date_time_lte]) and not all(
-            [date_time_gte, date_time_lte, targetted_datetime_field]
-        ):
+        content = get_content(record, field_name)
+        if content is None:
+            return APIResponse.error(
+                message=f"Field '{field_name}' is empty",
+                error_code="CONTENT_NOT_FOUND",
+                status_code=404,
+            )
+        segments, etag, mimetype = content
+        return stream_segments(
+            request.httprequest,
+            segments,
+            etag,
+            content_type=mimetype,
+            allow_compression=request.akm_client_descriptor.allow_compression,
+        )
+
+    def _get_session(self, client: Model, model_name: str, token: Any):
+        """Return the result session `token` of the client, else an error."""
+        session = request.env["akm.result.session"].sudo()
+        if isinstance(token, str):
+            session = session._get_client_session(client, token)
+        if not session or session.model_name != model_name:
             return (
                 APIResponse.error(
-                    message="All datetime parameters must be provided together",
-                    error_code="INVALID_DATETIME_PARAMS",
-                    status_code=400,
+                    message="Unknown or expired result session, start a new one "
+                    'with "session": true',
+                    error_code="SESSION_NOT_FOUND",
+                    status_code=404,
                 ),
                 None,
             )
+        return None, session
 
-        if date_time_gte and date_time_lte:
-            if not self._validate_datetime(
-                date_time_gte
-            ) or not self._validate_datetime(date_time_lte):
-                return (
-                    APIResponse.error(
-                        message=f"Datetime must be in format: {DEFAULT_SERVER_DATETIME_FORMAT}",
-                        error_code="INVALID_DATETIME_FORMAT",
-                        status_code=400,
-                    ),
-                    None,
-                )
-
-            ModelObj: Model = request.env[model_name].sudo()
-            fields_info = ModelObj.fields_get([targetted_datetime_field])
-
-            if not fields_info.get(targetted_datetime_field):
-                return (
-                    APIResponse.error(
-                        message=f"Field '{targetted_datetime_field}' does not exist",
-                        error_code="FIELD_NOT_FOUND",
-                        status_code=400,
-                    ),
-                    None,
-                )
-
-            if fields_info[targetted_datetime_field]["type"] != "datetime":
-                return (
-                    APIResponse.error(
-                        message=f"Field '{targetted_datetime_field}' must be datetime",
-                        error_code="INVALID_FIELD_TYPE",
-                        status_code=400,
-                    ),
-                    None,
-                )
+    def _read_ids_page(
+        self,
+        env,
+        model_name: str,
+        ids: List[int],
+        field_list: List[str],
+        paginator: Pagination,
+        response_format: str,
+        max_bytes: int = 0,
+    ) -> JsonDict:
+        """
+        Read the slice of a result session's `ids` for the page. The records
+        deleted since the search are left out and listed in `missing_ids`.
+        """
+        timer = current_timer()
+        ModelObj = env[model_name].sudo()
+        page_ids = ids[paginator.offset : paginator.offset + paginator.per_page]
+        with timer.phase("search"):
+            records = ModelObj.browse(page_ids).exists()
+
+        with timer.phase("read"):
+            res_data = read_chunked(
+                records, field_list, RECORDS_READ_CHUNK_SIZE, max_bytes
+            )
 
-            if not client.can_access_field(model_name, targetted_datetime_field):
-                return (
-                    APIResponse.error(
-                        message=f"Field '{targetted_datetime_field}' not accessible",
-                        error_code="FIELD_ACCESS_DENIED",
-                        status_code=403,
+        with timer.phase("serialize"):
+            # Ids of the slice consumed, up to the last record read when the
+            # page ended early
+            consumed = len(page_ids)
+            if len(res_data) < len(records):
+                consumed = page_ids.index(res_data[-1]["id"]) + 1
+            found = set(records.ids)
+            missing_ids = [i for i in page_ids[:consumed] if i not in found]
+            if response_format == "columnar":
+                res_data = to_columnar(res_data, ModelObj._fields, field_list)
+            return APIResponse.success(
+                data={
+                    "records": res_data,
+                    "missing_ids": missing_ids,
+                    "pagination": paginator.to_response(
+                        records_count=len(ids), returned=consumed
                     ),
-                    None,
-                )
-
-            domain.extend(
-                [
-                    (targetted_datetime_field, ">=", date_time_gte),
-                    (targetted_datetime_field, "<=", date_time_lte),
-                ]
+                }
             )
 
-        return None, domain
+    def _validate_ids(self, ids: Any) -> Tuple[Optional[JsonDict], Optional[List[int]]]:
+        """Validate the `ids` param, return them without duplicates."""
+        if not ids:
+            return (
+                APIResponse.error(
+                    message="No ids provided",
+                    error_code="MISSING_PARAMETER",
+                    status_code=400,
+                ),
+                None,
+            )
 
-    def _get_permitted_fields(
-        self, client: Model, model_name: str, fields_param: str
-    ) -> Tuple[Optional[JsonDict], Optional[List[str]]]:
-        """Get and validate permitted fields."""
-        field_list = []
+        if not isinstance(ids, list) or not all(
+            isinstance(record_id, int)
+            and not isinstance(record_id, bool)
+            and record_id > 0
+            for record_id in ids
+        ):
+            return (
+                APIResponse.error(
+                    message="ids must be a list of positive integers",
+                    error_code="INVALID_IDS",
+                    status_code=400,
+                ),
+                None,
+            )
 
-        if fields_param == "*":
-            permission = client.permission_ids.filtered(
-                lambda p: p.model_id.model == model_name
+        ids = list(dict.fromkeys(ids))
+        max_ids = request.akm_client_descriptor.max_per_page or RECORDS_BY_IDS_MAX
+        max_ids = min(max_ids, RECORDS_BY_IDS_MAX)
+        if len(ids) > max_ids:
+            return (
+                APIResponse.error(
+                    message=f"At most {max_ids} ids can be read at once",
+                    error_code="TOO_MANY_IDS",
+                    status_code=400,
+                    details={"max_ids": max_ids},
+                ),
+                None,
             )
-            if not permission:
-                return (
-                    APIResponse.error(
-                        message=f"No field permissions found for model '{model_name}'",
-                        error_code="NO_FIELD_PERMISSIONS",
-                        status_code=403,
-                    ),
-                    None,
+        return None, ids
+
+    def _read_page(
+        self,
+        env,
+        model_name: str,
+        domain: Domain,
+        field_list: List[str],
+        paginator: Pagination,
+        response_format: str,
+        count_mode: str = "exact",
+        max_bytes: int = 0,
+    ) -> JsonDict:
+        """
+        Search and read one page of records with the permitted fields.
+
+        Only the ids of the page are fetched; the total is counted according to
+        `count_mode`: `exact` runs a COUNT, `estimated` asks the planner, and
+        `none` fetches one extra id to tell whether a next page exists.
+
+        The records are read by chunks of `RECORDS_READ_CHUNK_SIZE`; the page
+        ends early, with `truncated` and the `next_offset` to continue from,
+        once its rows take `max_bytes`.
+        """
+        timer = current_timer()
+        try:
+            with timer.phase("search"):
+                ModelObj = env[model_name].sudo()
+                limit = paginator.per_page + (count_mode == "none")
+                paginated_records = ModelObj.search(
+                    domain, offset=paginator.offset, limit=limit
                 )
-            field_list = permission.field_ids.mapped("name")
-        else:
-            field_list = [f.strip() for f in fields_param.split(",") if f.strip()]
-            for field in field_list:
-                if not client.can_access_field(model_name, field):
-                    return (
-                        APIResponse.error(
-                            message=f"Field '{field}' not accessible",
-                            error_code="FIELD_ACCESS_DENIED",
-                            status_code=403,
-                        ),
-                        None,
+                has_more = None
+                if count_mode == "none":
+                    has_more = len(paginated_records) > paginator.per_page
+                    paginated_records = paginated_records[: paginator.per_page]
+                    records_count = None
+                elif paginated_records and len(paginated_records) < paginator.per_page:
+                    # Last page, the total is known without counting
+                    records_count = paginator.offset + len(paginated_records)
+                elif count_mode == "estimated":
+                    records_count = max(
+                        estimate_count(ModelObj, domain),
+                        paginator.offset + len(paginated_records),
                     )
+                else:
+                    records_count = ModelObj.search_count(domain)
+        except QueryCanceled:
+            raise
+        except Exception as e:
+            _logger.error(f"Error reading data: {e}")
 
-        if "id" not in field_list:
-            field_list.append("id")
+            return APIResponse.error(
+                message="Error fetching records",
+                error_code="READ_ERROR",
+                status_code=500,
+            )
 
-        return None, field_list
+        # Read records with permitted fields
+        with timer.phase("read"):
+            res_data = read_chunked(
+                paginated_records, field_list, RECORDS_READ_CHUNK_SIZE, max_bytes
+            )
+            if len(res_data) < len(paginated_records):
+                has_more = True
+
+        with timer.phase("serialize"):
+            if response_format == "columnar":
+                res_data = to_columnar(res_data, ModelObj._fields, field_list)
+            pagination_info = paginator.to_response(
+                records_count=records_count,
+                has_more=has_more,
+                count_mode=count_mode,
+                returned=len(res_data),
+            )
+            return APIResponse.success(
+                data={
+                    "records": res_data,
+                    "pagination": pagination_info,
+                }
+            )
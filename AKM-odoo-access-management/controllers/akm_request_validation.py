@@ -0,0 +1,222 @@
+from odoo.http import request
+from odoo.models import Model
+from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
+
+from datetime import datetime
+from typing import List, Dict, Optional, Any, Tuple, Literal
+
+from ..config.admission import acquire_slot
+from ..config.response import APIResponse
+
+DomainOperator = Literal["=", ">=", "<="]
+DomainTuple = Tuple[str, DomainOperator, Any]
+Domain = List[DomainTuple]
+JsonDict = Dict[str, Any]
+
+
+class AkmRequestValidationMixin:
+    """
+    Validation helpers shared by the controllers reading client data: client
+    scope, model and field permissions, datetime filters, admission limits.
+    """
+
+    def _validate_datetime(self, date_str: str) -> bool:
+        """Validate datetime string format."""
+        try:
+            datetime.strptime(date_str, DEFAULT_SERVER_DATETIME_FORMAT)
+            return True
+        except ValueError:
+            return False
+
+    def _validate_client(self, client: Optional[Model]) -> Optional[JsonDict]:
+        """Validate client and its scope."""
+        if not client:
+
+            return APIResponse.error(
+                message="Client not found",
+                error_code="INVALID_CLIENT",
+                status_code=401,
+            )
+
+        if client.scope not in ("read", "write", "admin"):
+            return APIResponse.error(
+                message="Client scope invalid",
+                error_code="INVALID_SCOPE",
+                status_code=403,
+            )
+        return None
+
+    def _validate_model_access(
+        self, client: Model, model_name: Optional[str]
+    ) -> Optional[JsonDict]:
+        """Validate model name and access."""
+        if not model_name:
+            return APIResponse.error(
+                message="No model_name provided",
+                error_code="MISSING_PARAMETER",
+                status_code=400,
+            )
+
+        if not client.can_access_model(model_name):
+            return APIResponse.error(
+                message=f"Model '{model_name}' not accessible for this client",
+                error_code="ACCESS_DENIED",
+                status_code=403,
+            )
+        return None
+
+    def _validate_datetime_params(
+        self,
+        client: Model,
+        model_name: str,
+        date_time_gte: Optional[str],
+        date_time_lte: Optional[str],
+        targetted_datetime_field: Optional[str],
+    ) -> Tuple[Optional[JsonDict], Optional[Domain]]:
+        """Validate datetime parameters and return domain if valid."""
+        domain = []
+
+        if any([date_time_gte, date_time_lte]) and not all(
+            [date_time_gte, date_time_lte, targetted_datetime_field]
+        ):
+            return (
+                APIResponse.error(
+                    message="All datetime parameters must be provided together",
+                    error_code="INVALID_DATETIME_PARAMS",
+                    status_code=400,
+                ),
+                None,
+            )
+
+        if date_time_gte and date_time_lte:
+            if not self._validate_datetime(
+                date_time_gte
+            ) or not self._validate_datetime(date_time_lte):
+                return (
+                    APIResponse.error(
+                        message=f"Datetime must be in format: {DEFAULT_SERVER_DATETIME_FORMAT}",
+                        error_code="INVALID_DATETIME_FORMAT",
+                        status_code=400,
+                    ),
+                    None,
+                )
+
+            fields_info = request.env["akm.client.permission"]._get_field_schema(
+                model_name
+            )
+
+            if not fields_info.get(targetted_datetime_field):
+                return (
+                    APIResponse.error(
+                        message=f"Field '{targetted_datetime_field}' does not exist",
+                        error_code="FIELD_NOT_FOUND",
+                        status_code=400,
+                    ),
+                    None,
+                )
+
+            if fields_info[targetted_datetime_field]["type"] != "datetime":
+                return (
+                    APIResponse.error(
+                        message=f"Field '{targetted_datetime_field}' must be datetime",
+                        error_code="INVALID_FIELD_TYPE",
+                        status_code=400,
+                    ),
+                    None,
+                )
+
+            if not client.can_access_field(model_name, targetted_datetime_field):
+                return (
+                    APIResponse.error(
+                        message=f"Field '{targetted_datetime_field}' not accessible",
+                        error_code="FIELD_ACCESS_DENIED",
+                        status_code=403,
+                    ),
+                    None,
+                )
+
+            domain.extend(
+                [
+                    (targetted_datetime_field, ">=", date_time_gte),
+                    (targetted_datetime_field, "<=", date_time_lte),
+                ]
+            )
+
+        return None, domain
+
+    def _get_permitted_fields(
+        self, client: Model, model_name: str, fields_param: str
+    ) -> Tuple[Optional[JsonDict], Optional[List[str]]]:
+        """Get and validate permitted fields."""
+        field_list = []
+
+        if fields_param == "*":
+            permissions = request.env["akm.client.permission"]._get_client_permissions(
+                client.id
+            )
+            if model_name not in permissions:
+                return (
+                    APIResponse.error(
+                        message=f"No field permissions found for model '{model_name}'",
+                        error_code="NO_FIELD_PERMISSIONS",
+                        status_code=403,
+                    ),
+                    None,
+                )
+            field_list = sorted(permissions[model_name])
+        else:
+            field_list = [f.strip() for f in fields_param.split(",") if f.strip()]
+            for field in field_list:
+                if not client.can_access_field(model_name, field):
+                    return (
+                        APIResponse.error(
+                            message=f"Field '{field}' not accessible",
+                            error_code="FIELD_ACCESS_DENIED",
+                            status_code=403,
+                        ),
+                        None,
+                    )
+
+        if "id" not in field_list:
+            field_list.append("id")
+
+        return None, field_list
+
+    def _validate_per_page(self, per_page: int) -> Optional[JsonDict]:
+        """Reject pages larger than the client's `max_per_page`."""
+        max_per_page = request.akm_client_descriptor.max_per_page
+        if max_per_page and per_page > max_per_page:
+            return APIResponse.error(
+                message=f"per_page may not exceed {max_per_page}",
+                error_code="PER_PAGE_TOO_LARGE",
+                status_code=400,
+                details={"max_per_page": max_per_page},
+            )
+        return None
+
+    def _admit_heavy_request(self) -> Optional[JsonDict]:
+        """
+        Take a concurrency slot of the client for the rest of the request, or
+        return a 429 error once the brief wait for a free slot is over.
+        """
+        client = request.akm_client_descriptor
+        limit = client.max_concurrent_requests
+        if limit and not acquire_slot(request.env.cr, client.id, limit):
+            request.future_response.headers["Retry-After"] = "1"
+            return APIResponse.error(
+                message="Too many concurrent requests for this client",
+                error_code="TOO_MANY_REQUESTS",
+                status_code=429,
+                details={"max_concurrent_requests": limit},
+            )
+        return None
+
+    def _query_timeout_error(self) -> JsonDict:
+        timeout = request.akm_client_descriptor.statement_timeout_ms
+        return APIResponse.error(
+            message=f"The query was cancelled after {timeout} ms, narrow the "
+            "date range or request smaller pages",
+            error_code="QUERY_TIMEOUT",
+            status_code=503,
+            details={"statement_timeout_ms": timeout},
+        )
@@ -0,0 +1,161 @@
+from odoo import http
+from odoo.http import request
+from odoo.models import Model
+
+from typing import Dict, Optional, Any
+
+from ..config.response import APIResponse
+from ..config.constants import API_PREFIX
+from ..config.decorators import log_request, require_authenticated_client
+from ..models.akm_webhook import WEBHOOK_EVENTS
+from .akm_request_validation import AkmRequestValidationMixin, JsonDict
+
+
+class AkmWebhooksController(AkmRequestValidationMixin, http.Controller):
+    """
+    Webhook Subscriptions Controller
+
+    Instead of polling `/records`, a client subscribes to the changes of a
+    permitted model and receives the ids of the created, updated and deleted
+    records in signed, batched POST requests.
+
+    Endpoints:
+    - POST /webhooks: Subscribe
+    - GET /webhooks: List the client's subscriptions
+    - DELETE /webhooks/<subscription_id>: Unsubscribe
+    """
+
+    @http.route(
+        f"{API_PREFIX}/webhooks",
+        type="json",
+        auth="none",
+        methods=["POST"],
+        csrf=False,
+    )
+    @log_request
+    @require_authenticated_client
+    def subscribe(self, **kwargs: Dict[str, Any]) -> JsonDict:
+        """
+        Subscribe to the Changes of a Model
+
+        Request:
+            {
+                "model_name": "res.partner",
+                "url": "https://myapp.com/webhooks/odoo",
+                "events": ["create", "write", "unlink"]
+            }
+
+        Response (201):
+            {
+                "subscription_id": 3,
+                "secret": "...",
+                ...
+            }
+
+        The secret is only returned here, it signs every delivery.
+
+        Errors:
+            - MISSING_PARAMETER (400), ACCESS_DENIED (403)
+            - INVALID_URL (400), INVALID_EVENTS (400)
+        """
+        client: Optional[Model] = kwargs.get("client")
+        if error := self._validate_client(client):
+            return error
+
+        model_name = kwargs.get("model_name")
+        if error := self._validate_model_access(client, model_name):
+            return error
+
+        url = kwargs.get("url")
+        Subscription = request.env["akm.webhook.subscription"].sudo()
+        if not isinstance(url, str) or not Subscription._is_url_allowed(url):
+            return APIResponse.error(
+                message="url must be an HTTP/HTTPS URL of a public host",
+                error_code="INVALID_URL",
+                status_code=400,
+            )
+
+        events = kwargs.get("events", list(WEBHOOK_EVENTS))
+        if (
+            not isinstance(events, list)
+            or not events
+            or not set(events) <= set(WEBHOOK_EVENTS)
+        ):
+            return APIResponse.error(
+                message="Invalid events",
+                error_code="INVALID_EVENTS",
+                status_code=400,
+                details={"allowed": list(WEBHOOK_EVENTS)},
+            )
+
+        model = request.env["ir.model"].sudo()._get(model_name)
+        subscription = Subscription.create(
+            {
+                "client_id": client.id,
+                "model_id": model.id,
+                "url": url,
+                **{f"on_{event}": event in events for event in WEBHOOK_EVENTS},
+            }
+        )
+        return APIResponse.success(
+            data={**subscription._get_status(), "secret": subscription.secret},
+            message="Subscribed",
+            status_code=201,
+        )
+
+    @http.route(
+        f"{API_PREFIX}/webhooks",
+        type="json",
+        auth="none",
+        methods=["GET"],
+        csrf=False,
+    )
+    @log_request
+    @require_authenticated_client
+    def list_subscriptions(self, **kwargs: Dict[str, Any]) -> JsonDict:
+        """List the Webhook Subscriptions of the Client"""
+        client: Optional[Model] = kwargs.get("client")
+        if error := self._validate_client(client):
+            return error
+        subscriptions = (
+            request.env["akm.webhook.subscription"]
+            .sudo()
+            .search([("client_id", "=", client.id)])
+        )
+        return APIResponse.success(
+            data=[subscription._get_status() for subscription in subscriptions]
+        )
+
+    @http.route(
+        f"{API_PREFIX}/webhooks/<int:subscription_id>",
+        type="json",
+        auth="none",
+        methods=["DELETE"],
+        csrf=False,
+    )
+    @log_request
+    @require_authenticated_client
+    def unsubscribe(self, subscription_id: int, **kwargs: Dict[str, Any]) -> JsonDict:
+        """
+        Delete a Subscription, its queued events are dropped
+
+        Errors:
+            - WEBHOOK_NOT_FOUND (404): Unknown subscription or of another client
+        """
+        client: Optional[Model] = kwargs.get("client")
+        if error := self._validate_client(client):
+            return error
+        subscription = (
+            request.env["akm.webhook.subscription"]
+            .sudo()
+            .browse(subscription_id)
+            .exists()
+        )
+        if not subscription or subscription.client_id != client:
+            return APIResponse.error(
+                message="Webhook subscription not found",
+                error_code="WEBHOOK_NOT_FOUND",
+                status_code=404,
+            )
+        subscription.unlink()
+        return APIResponse.success(message="Unsubscribed")
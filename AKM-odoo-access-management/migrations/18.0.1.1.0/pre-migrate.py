@@ -0,0 +1,68 @@
+"""
+Request log rows reference their endpoint and user agent through lookup
+tables and store their parameters as jsonb; the stored `name` is dropped, it
+is computed now.
+
+Everything is converted before the models are loaded, so that the NOT NULL
+constraint of `endpoint_id` can be set. The table keeps the space of the
+dropped columns until it is rewritten, run `VACUUM FULL akm_request_log` (or
+pg_repack) in a maintenance window.
+"""
+
+# `LOG_LOOKUP_MAX_LENGTH` of config/constants.py, migrations cannot import it
+LOG_LOOKUP_MAX_LENGTH = 512
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    for table, column, fk in (
+        ("akm_request_endpoint", "endpoint", "endpoint_id"),
+        ("akm_request_user_agent", "user_agent", "user_agent_id"),
+    ):
+        cr.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id serial PRIMARY KEY,
+                name varchar NOT NULL,
+                create_date timestamp,
+                write_date timestamp,
+                CONSTRAINT {table}_unique_name UNIQUE (name)
+            );
+
+            INSERT INTO {table} (name, create_date, write_date)
+            SELECT DISTINCT left({column}, %(max_length)s),
+                   now() at time zone 'UTC', now() at time zone 'UTC'
+            FROM akm_request_log
+            WHERE {column} IS NOT NULL
+            ON CONFLICT (name) DO NOTHING;
+
+            ALTER TABLE akm_request_log ADD COLUMN {fk} integer;
+
+            UPDATE akm_request_log log
+            SET {fk} = lookup.id
+            FROM {table} lookup
+            WHERE lookup.name = left(log.{column}, %(max_length)s);
+
+            ALTER TABLE akm_request_log DROP COLUMN {column};
+            """,
+            {"max_length": LOG_LOOKUP_MAX_LENGTH},
+        )
+    cr.execute("ALTER TABLE akm_request_log DROP COLUMN IF EXISTS name")
+
+    # Parameters were serialized with `serialization.dumps`, rows that are not
+    # valid JSON are kept as a JSON string
+    cr.execute("""
+        CREATE OR REPLACE FUNCTION pg_temp.akm_to_jsonb(value text) RETURNS jsonb
+        LANGUAGE plpgsql IMMUTABLE AS $$
+        BEGIN
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN to_jsonb(value);
+        END;
+        $$;
+
+        ALTER TABLE akm_request_log
+            ALTER COLUMN request_params TYPE jsonb
+            USING pg_temp.akm_to_jsonb(request_params);
+        """)
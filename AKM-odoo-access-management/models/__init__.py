@@ -2,4 +2,13 @@ from . import akm_oauth_client
 from . import akm_oauth_authcode
 from . import akm_oauth_token
 from . import akm_client_permission
+from . import akm_request_lookup
 from . import akm_request_log
+from . import ir_http
+from . import akm_export_job
+from . import akm_model_version
+from . import base
+from . import akm_index_advisor
+from . import akm_webhook
+from . import akm_warmup
+from . import akm_result_session
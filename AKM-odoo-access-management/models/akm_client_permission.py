@@ -1,4 +1,6 @@
-from odoo import models, fields
+from typing import Dict
+
+from odoo import api, models, fields, tools
 
 
 class AkmClientPermission(models.Model):
@@ -41,3 +43,80 @@ class AkmClientPermission(models.Model):
             "Client-Model combination must be unique.",
         )
     ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        permissions = super().create(vals_list)
+        self._bump_permission_version(permissions.client_id)
+        return permissions
+
+    def write(self, vals):
+        clients = self.client_id
+        res = super().write(vals)
+        self._bump_permission_version(clients | self.client_id)
+        return res
+
+    def unlink(self):
+        self._bump_permission_version(self.client_id)
+        return super().unlink()
+
+    @api.model
+    def _bump_permission_version(self, clients):
+        """
+        Invalidate the API results cached for `clients`, and the set of models
+        whose changes are tracked for those caches. Writing the version
+        publishes the clients on the `client` invalidation channel.
+        """
+        for client in clients.sudo():
+            client.permission_version += 1
+        self.env.registry.clear_cache()
+
+    @api.model
+    @tools.ormcache("client_id")
+    def _get_client_permissions(self, client_id: int) -> Dict[str, frozenset]:
+        """
+        Permission matrix of a client: permitted model -> permitted field
+        names. Cached until the next permission change, do not modify it.
+        """
+        self.env.cr.execute(
+            """
+            SELECT m.model, array_remove(array_agg(f.name), NULL)
+            FROM akm_client_permission p
+            JOIN ir_model m ON m.id = p.model_id
+            LEFT JOIN akm_permission_field_rel r ON r.permission_id = p.id
+            LEFT JOIN ir_model_fields f ON f.id = r.field_id
+            WHERE p.client_id = %s
+            GROUP BY m.model
+            """,
+            [client_id],
+        )
+        return {model: frozenset(names) for model, names in self.env.cr.fetchall()}
+
+    @api.model
+    @tools.ormcache("model_name", "self.env.lang")
+    def _get_field_schema(self, model_name: str) -> Dict[str, dict]:
+        """
+        `fields_get()` of a model trimmed to the attributes the API returns.
+        Cached until the registry changes, do not modify it.
+        """
+        return (
+            self.env[model_name]
+            .sudo()
+            .fields_get(
+                attributes=[
+                    "type",
+                    "required",
+                    "readonly",
+                    "string",
+                    "relation",
+                    "selection",
+                ]
+            )
+        )
+
+    def action_open_index_advisor(self):
+        """Analyze the filter fields of these permissions in the index advisor."""
+        advisor = self.env["akm.index.advisor"].create(
+            {"permission_ids": [fields.Command.set(self.ids)]}
+        )
+        return advisor.action_analyze()
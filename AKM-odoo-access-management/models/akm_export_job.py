@@ -0,0 +1,452 @@
+import hashlib
+import json
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from odoo import api, fields, models, SUPERUSER_ID
+from odoo.tools import SQL
+from ..config.constants import (
+    API_PREFIX,
+    MODULE_NAME,
+    EXPORT_MAX_THREADS_PARAM,
+    EXPORT_DEFAULT_MAX_THREADS,
+    EXPORT_MAX_ATTEMPTS,
+    EXPORT_HEARTBEAT_TIMEOUT,
+    EXPORT_RETENTION,
+    EXPORT_READ_BATCH_SIZE,
+    EXPORT_ROWS_PER_FILE,
+)
+from ..config.binary_fields import read_rows
+from ..config.serialization import dumps_bytes
+from ..config.streaming import Segment, make_etag
+from ..config.utils import get_config_int
+
+_logger = logging.getLogger(__name__)
+
+
+def _touch_job(registry, job_id: int):
+    """
+    Update the heartbeat of a running job, see `_reap_stale_jobs`. Shards run
+    concurrently, so it runs in its own short READ COMMITTED transaction.
+    """
+    with registry.cursor() as cr:
+        cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+        cr.execute(
+            """
+            UPDATE akm_export_job SET heartbeat_at = now() AT TIME ZONE 'UTC'
+            WHERE id = %s
+            """,
+            [job_id],
+        )
+
+
+def _export_shard(
+    registry,
+    job_id: int,
+    model_name: str,
+    field_list: List[str],
+    shard: int,
+    domain: List,
+) -> List[Dict]:
+    """
+    Export one shard of a job into NDJSON chunk attachments.
+
+    Runs in a worker thread with its own cursor; every chunk file is committed
+    as soon as it is written so memory stays bounded by `EXPORT_ROWS_PER_FILE`,
+    and updates the heartbeat of the job.
+
+    Returns:
+        list: One manifest entry per chunk file written, in order.
+    """
+    chunks = []
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        Model = env[model_name]
+        ids = Model.search(domain, order="id").ids
+        for part, file_start in enumerate(range(0, len(ids), EXPORT_ROWS_PER_FILE)):
+            file_ids = ids[file_start : file_start + EXPORT_ROWS_PER_FILE]
+            lines = []
+            for start in range(0, len(file_ids), EXPORT_READ_BATCH_SIZE):
+                batch = file_ids[start : start + EXPORT_READ_BATCH_SIZE]
+                rows = read_rows(Model.browse(batch), field_list)
+                lines.extend(dumps_bytes(row) for row in rows)
+                env.invalidate_all()
+            data = b"\n".join(lines) + b"\n"
+            attachment = env["ir.attachment"].create(
+                {
+                    "name": f"export-{job_id}-{shard:04d}-{part:04d}.jsonl",
+                    "raw": data,
+                    "res_model": "akm.export.job",
+                    "res_id": job_id,
+                    "mimetype": "application/x-ndjson",
+                }
+            )
+            cr.commit()
+            _touch_job(registry, job_id)
+            chunks.append(
+                {
+                    "shard": shard,
+                    "part": part,
+                    "attachment_id": attachment.id,
+                    "name": attachment.name,
+                    "records": len(file_ids),
+                    "size": len(data),
+                    "checksum": hashlib.sha1(data).hexdigest(),
+                    "min_id": file_ids[0],
+                    "max_id": file_ids[-1],
+                }
+            )
+    return chunks
+
+
+class AkmExportJob(models.Model):
+    """
+    Bulk export of a permitted model, split into shards processed in parallel.
+
+    The id space (or a datetime range) of the model is split into `shard_count`
+    shards. Each shard is read by a thread of a pool, with its own cursor, and
+    written as ordered NDJSON chunk attachments described by `manifest`.
+    """
+
+    _name = "akm.export.job"
+    _description = "API Export Job"
+    _order = "create_date desc"
+
+    name = fields.Char(compute="_compute_name", store=True)
+    client_id = fields.Many2one(
+        "akm.oauth.client", string="OAuth Client", required=True, ondelete="cascade"
+    )
+    model_name = fields.Char(required=True)
+    field_names = fields.Char(
+        help="Comma-separated fields to export, empty for all permitted fields"
+    )
+
+    shard_by = fields.Selection(
+        [("id", "Record ID"), ("datetime", "Datetime Field")],
+        default="id",
+        required=True,
+    )
+    targetted_datetime_field = fields.Char(string="Datetime Field")
+    date_time_gte = fields.Datetime(string="From")
+    date_time_lte = fields.Datetime(string="To")
+    shard_count = fields.Integer(default=4, required=True)
+
+    state = fields.Selection(
+        [
+            ("draft", "Draft"),
+            ("queued", "Queued"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+        ],
+        default="draft",
+        required=True,
+        readonly=True,
+    )
+    record_count = fields.Integer(readonly=True)
+    result_size = fields.Integer(readonly=True, help="Size of the result in bytes")
+    manifest = fields.Text(readonly=True, help="Ordered list of chunk files (JSON)")
+    error = fields.Text(readonly=True)
+    started_at = fields.Datetime(readonly=True)
+    heartbeat_at = fields.Datetime(
+        readonly=True, help="Last time the running export wrote a chunk file"
+    )
+    attempts = fields.Integer(
+        readonly=True, help="Number of times the cron started the export"
+    )
+    finished_at = fields.Datetime(readonly=True)
+
+    @api.depends("model_name", "create_date")
+    def _compute_name(self):
+        for record in self:
+            record.name = f"{record.model_name} ({record.create_date})"
+
+    def _get_export_fields(self) -> List[str]:
+        """
+        Resolve the exported fields, enforcing the client's field permissions.
+
+        Raises:
+            ValidationError: If the model or a field is not accessible.
+        """
+        self.ensure_one()
+        client = self.client_id
+        if not client.can_access_model(self.model_name):
+            raise models.ValidationError(
+                f"Model '{self.model_name}' not accessible for this client"
+            )
+
+        if self.field_names:
+            field_list = [f.strip() for f in self.field_names.split(",") if f.strip()]
+            for field in field_list:
+                if not client.can_access_field(self.model_name, field):
+                    raise models.ValidationError(f"Field '{field}' not accessible")
+        else:
+            # Same resolution as the `fields="*"` of /records
+            permissions = self.env["akm.client.permission"]._get_client_permissions(
+                client.id
+            )
+            field_list = sorted(permissions[self.model_name])
+
+        if "id" not in field_list:
+            field_list.append("id")
+        return field_list
+
+    def _get_base_domain(self) -> List:
+        self.ensure_one()
+        if not (self.date_time_gte and self.date_time_lte):
+            return []
+        if not self.client_id.can_access_field(
+            self.model_name, self.targetted_datetime_field
+        ):
+            raise models.ValidationError(
+                f"Field '{self.targetted_datetime_field}' not accessible"
+            )
+        return [
+            (self.targetted_datetime_field, ">=", self.date_time_gte),
+            (self.targetted_datetime_field, "<=", self.date_time_lte),
+        ]
+
+    def _get_shard_domains(self, domain: List) -> List[List]:
+        """Split the export into at most `shard_count` non-overlapping domains."""
+        self.ensure_one()
+        count = max(self.shard_count, 1)
+
+        if self.shard_by == "datetime":
+            field = self.targetted_datetime_field
+            start, end = self.date_time_gte, self.date_time_lte
+            if not (field and start and end):
+                raise models.ValidationError(
+                    "Sharding by datetime requires a datetime field and range"
+                )
+            step = (end - start) / count
+            bounds = [start + step * index for index in range(count)] + [end]
+            return [
+                domain
+                + [
+                    (field, ">=", bounds[index]),
+                    (field, "<=" if index == count - 1 else "<", bounds[index + 1]),
+                ]
+                for index in range(count)
+            ]
+
+        table = self.env[self.model_name]._table
+        self.env.cr.execute(
+            SQL("SELECT min(id), max(id) FROM %s", SQL.identifier(table))
+        )
+        min_id, max_id = self.env.cr.fetchone()
+        if min_id is None:
+            return []
+        step = math.ceil((max_id - min_id + 1) / count)
+        return [
+            domain
+            + [
+                ("id", ">=", min_id + index * step),
+                ("id", "<", min_id + (index + 1) * step),
+            ]
+            for index in range(count)
+            if min_id + index * step <= max_id
+        ]
+
+    def _get_chunk_attachments(self):
+        return self.env["ir.attachment"].search(
+            [("res_model", "=", self._name), ("res_id", "in", self.ids)]
+        )
+
+    def action_run(self):
+        self.write({"state": "queued"})
+        self.env.ref(f"{MODULE_NAME}.ir_cron_akm_process_export_jobs")._trigger()
+
+    def _run_export(self):
+        """
+        Export all shards in parallel and store the manifest.
+
+        Only run by the cron, on a claimed job: the transaction is committed
+        before the shards start, so none stays open while they are exported.
+        """
+        self.ensure_one()
+        self._get_chunk_attachments().unlink()
+        self.write(
+            {
+                "finished_at": False,
+                "error": False,
+                "manifest": False,
+                "record_count": 0,
+                "result_size": 0,
+            }
+        )
+
+        try:
+            field_list = self._get_export_fields()
+            shards = self._get_shard_domains(self._get_base_domain())
+            max_threads = get_config_int(
+                self.env, EXPORT_MAX_THREADS_PARAM, EXPORT_DEFAULT_MAX_THREADS
+            )
+            job_id, model_name = self.id, self.model_name
+            self.env.cr.commit()
+            with ThreadPoolExecutor(
+                max_workers=max(min(len(shards), max_threads), 1),
+                thread_name_prefix=f"akm_export_{job_id}",
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _export_shard,
+                        self.env.registry,
+                        job_id,
+                        model_name,
+                        field_list,
+                        shard,
+                        domain,
+                    )
+                    for shard, domain in enumerate(shards)
+                ]
+                chunks = [chunk for future in futures for chunk in future.result()]
+        except Exception as e:
+            _logger.exception("Export job %s failed", self.id)
+            self._get_chunk_attachments().unlink()
+            self.write(
+                {
+                    "state": "failed",
+                    "error": str(e),
+                    "finished_at": fields.Datetime.now(),
+                }
+            )
+            return False
+
+        record_count = sum(chunk["records"] for chunk in chunks)
+        result_size = sum(chunk["size"] for chunk in chunks)
+        self.write(
+            {
+                "state": "done",
+                "record_count": record_count,
+                "result_size": result_size,
+                "finished_at": fields.Datetime.now(),
+                "manifest": json.dumps(
+                    {
+                        "model": self.model_name,
+                        "fields": field_list,
+                        "format": "ndjson",
+                        "records": record_count,
+                        "size": result_size,
+                        "chunks": chunks,
+                    }
+                ),
+            }
+        )
+        return True
+
+    def _get_status(self) -> Dict:
+        """Status of the job as returned by the API."""
+        self.ensure_one()
+        status = {
+            "job_id": self.id,
+            "state": self.state,
+            "model_name": self.model_name,
+            "record_count": self.record_count,
+            "size": self.result_size,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.state == "done":
+            status["download_url"] = f"{API_PREFIX}/exports/{self.id}/download"
+            status["chunks"] = len(json.loads(self.manifest)["chunks"])
+        if self.state == "failed":
+            status["error"] = self.error
+        return status
+
+    def _get_download(self):
+        """
+        Return the ordered segments and the ETag of the job's result.
+        """
+        self.ensure_one()
+        chunks = json.loads(self.manifest)["chunks"]
+        attachments = self.env["ir.attachment"].browse(
+            [chunk["attachment_id"] for chunk in chunks]
+        )
+        segments = [Segment.from_attachment(attachment) for attachment in attachments]
+        etag = make_etag(chunk["checksum"] for chunk in chunks)
+        return segments, etag
+
+    @api.model
+    def _cron_process_export_jobs(self):
+        """
+        Run queued jobs one after the other.
+
+        Jobs are claimed with `FOR UPDATE SKIP LOCKED` and committed as running,
+        with a heartbeat, before the export starts, so several cron workers
+        never run the same job and no lock is held while it is exported.
+        """
+        self._reap_stale_jobs()
+        self.env.cr.commit()
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM akm_export_job
+                WHERE state = 'queued'
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+                """)
+            row = self.env.cr.fetchone()
+            if not row:
+                return
+            job = self.browse(row[0])
+            now = fields.Datetime.now()
+            job.write(
+                {
+                    "state": "running",
+                    "started_at": now,
+                    "heartbeat_at": now,
+                    "attempts": job.attempts + 1,
+                }
+            )
+            self.env.cr.commit()
+            job._run_export()
+            self.env.cr.commit()
+
+    @api.model
+    def _reap_stale_jobs(self):
+        """
+        Recover the jobs left running by a cron worker that died (crash, time
+        or memory limit): requeued, or failed once started `EXPORT_MAX_ATTEMPTS`
+        times.
+
+        A live export updates the heartbeat of its job after every chunk file,
+        only jobs without one for `EXPORT_HEARTBEAT_TIMEOUT` are recovered,
+        however long the export takes.
+        """
+        self.env.cr.execute(
+            """
+            SELECT id FROM akm_export_job
+            WHERE state = 'running'
+              AND (heartbeat_at IS NULL OR heartbeat_at < %s)
+            FOR UPDATE SKIP LOCKED
+            """,
+            [fields.Datetime.now() - EXPORT_HEARTBEAT_TIMEOUT],
+        )
+        jobs = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if not jobs:
+            return
+        _logger.warning("Recovering interrupted export jobs %s", jobs.ids)
+        jobs._get_chunk_attachments().unlink()
+        exhausted = jobs.filtered(lambda job: job.attempts >= EXPORT_MAX_ATTEMPTS)
+        exhausted.write(
+            {
+                "state": "failed",
+                "error": "The export was interrupted",
+                "finished_at": fields.Datetime.now(),
+            }
+        )
+        (jobs - exhausted).write(
+            {"state": "queued", "started_at": False, "heartbeat_at": False}
+        )
+
+    @api.model
+    def _cron_purge_export_jobs(self):
+        """Delete finished jobs, and their result files, after the retention."""
+        limit = fields.Datetime.now() - EXPORT_RETENTION
+        jobs = self.search(
+            [("state", "in", ("done", "failed")), ("finished_at", "<", limit)]
+        )
+        jobs._get_chunk_attachments().unlink()
+        jobs.unlink()
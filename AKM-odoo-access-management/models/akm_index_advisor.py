@@ -0,0 +1,343 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import Optional
+
+from psycopg2.extensions import (
+    ISOLATION_LEVEL_AUTOCOMMIT,
+    ISOLATION_LEVEL_REPEATABLE_READ,
+)
+
+from odoo import api, fields, models, SUPERUSER_ID
+from odoo.sql_db import db_connect
+from odoo.tools import SQL
+from odoo.tools.sql import make_index_name
+
+_logger = logging.getLogger(__name__)
+
+# Index tuple header and line pointer, in bytes, and default btree fillfactor
+_INDEX_TUPLE_OVERHEAD = 8
+_LINE_POINTER_SIZE = 4
+_BTREE_FILLFACTOR = 0.9
+
+
+def _maxalign(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+class AkmIndexAdvisor(models.TransientModel):
+    """
+    Index advisor for the fields clients filter `/records` and exports on.
+
+    The request logs tell which `targetted_datetime_field` every client
+    actually uses; each of them is checked for a usable index and can get one,
+    built with `CREATE INDEX CONCURRENTLY` so the table stays writable.
+    """
+
+    _name = "akm.index.advisor"
+    _description = "API Index Advisor"
+
+    permission_ids = fields.Many2many(
+        "akm.client.permission",
+        string="Permissions",
+        help="Permissions to analyze, all of them when empty.",
+    )
+    days = fields.Integer(
+        string="Analyzed Days",
+        default=30,
+        required=True,
+        help="Number of days of request logs to analyze.",
+    )
+    line_ids = fields.One2many(
+        "akm.index.advisor.line", "advisor_id", string="Filtered Fields"
+    )
+
+    def action_analyze(self):
+        self.ensure_one()
+        self.line_ids.unlink()
+        usage = self._get_filter_usage()
+        lines = []
+        for (model_name, field_name), stats in sorted(usage.items()):
+            if model_name not in self.env:
+                continue
+            field = self.env[model_name]._fields.get(field_name)
+            if field is None or not field.store or not field.column_type:
+                continue
+            lines.append(
+                {
+                    "advisor_id": self.id,
+                    "model_name": model_name,
+                    "field_name": field_name,
+                    "request_count": round(stats["count"]),
+                    "client_count": len(stats["clients"]),
+                    "sample_gte": stats["gte"],
+                    "sample_lte": stats["lte"],
+                }
+            )
+        self.env["akm.index.advisor.line"].create(lines)._refresh_index_info()
+        return self._reopen()
+
+    def _get_filter_usage(self) -> dict:
+        """
+        Count the successful requests filtering on each `(model, field)` of the
+        analyzed permissions, with the most recent range as a sample query.
+        Sampled log rows count for their `sample_weight`.
+        """
+        permissions = self.permission_ids or self.env["akm.client.permission"].search(
+            []
+        )
+        permitted = {(p.client_id.id, p.model_id.model) for p in permissions}
+        since = fields.Datetime.now() - timedelta(days=self.days)
+        self.env.cr.execute(
+            """
+            SELECT client_id, sample_weight,
+                   request_params->>'model_name',
+                   request_params->>'targetted_datetime_field',
+                   request_params->>'date_time_gte',
+                   request_params->>'date_time_lte'
+            FROM akm_request_log
+            WHERE create_date >= %s
+              AND status_code < 400
+              AND request_params ? 'targetted_datetime_field'
+            ORDER BY create_date DESC
+            """,
+            [since],
+        )
+        usage = defaultdict(
+            lambda: {"count": 0, "clients": set(), "gte": False, "lte": False}
+        )
+        for (
+            client_id,
+            weight,
+            model_name,
+            field_name,
+            gte,
+            lte,
+        ) in self.env.cr.fetchall():
+            if not field_name or (client_id, model_name) not in permitted:
+                continue
+            stats = usage[(model_name, field_name)]
+            stats["count"] += weight or 1.0
+            stats["clients"].add(client_id)
+            if not stats["gte"]:
+                stats["gte"] = gte or False
+                stats["lte"] = lte or False
+        return usage
+
+    def _reopen(self):
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+
+class AkmIndexAdvisorLine(models.TransientModel):
+    _name = "akm.index.advisor.line"
+    _description = "API Index Advisor Line"
+    _order = "request_count desc"
+
+    advisor_id = fields.Many2one("akm.index.advisor", required=True, ondelete="cascade")
+    model_name = fields.Char(required=True)
+    field_name = fields.Char(required=True)
+    request_count = fields.Integer(string="Requests")
+    client_count = fields.Integer(string="Clients")
+    sample_gte = fields.Char(help="Lower bound of the most recent request")
+    sample_lte = fields.Char(help="Upper bound of the most recent request")
+    index_name = fields.Char(
+        help="Existing index whose first column is the field, if any"
+    )
+    indexed = fields.Boolean()
+    index_state = fields.Selection(
+        [("building", "Building"), ("failed", "Failed")],
+        help="State of the index build started from the advisor",
+    )
+    index_error = fields.Text()
+    estimated_rows = fields.Integer(help="Planner estimate of the table rows")
+    estimated_size = fields.Integer(
+        string="Index Size (KiB)",
+        help="Estimated size of the index, or its actual size once created",
+    )
+    cost_before = fields.Float(
+        string="Cost Without Index",
+        help="Planner cost of counting the records of the sample range",
+    )
+    cost_after = fields.Float(
+        string="Cost With Index",
+        help="Planner cost of the same query using the index (estimated with "
+        "the hypopg extension when installed, else known once created)",
+    )
+
+    def _get_table_column(self):
+        field = self.env[self.model_name]._fields[self.field_name]
+        return self.env[self.model_name]._table, field.name
+
+    def _find_index(self, table: str, column: str) -> Optional[tuple]:
+        """Return `(name, valid)` of an index leading with `column`, if any."""
+        self.env.cr.execute(
+            """
+            SELECT i.relname, x.indisvalid
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            JOIN pg_attribute a
+              ON a.attrelid = x.indrelid AND a.attnum = x.indkey[0]
+            WHERE x.indrelid = %s::regclass AND a.attname = %s
+            ORDER BY x.indisvalid DESC
+            LIMIT 1
+            """,
+            [table, column],
+        )
+        return self.env.cr.fetchone()
+
+    def _explain_cost(self, table: str, column: str) -> float:
+        query = SQL(
+            "SELECT COUNT(*) FROM %s WHERE %s >= %s AND %s <= %s",
+            SQL.identifier(table),
+            SQL.identifier(column),
+            self.sample_gte or "-infinity",
+            SQL.identifier(column),
+            self.sample_lte or "infinity",
+        )
+        self.env.cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query))
+        return self.env.cr.fetchone()[0][0]["Plan"]["Total Cost"]
+
+    def _estimate_index_size(self, table: str, column: str) -> int:
+        """Btree size estimate from the table row count and column width."""
+        self.env.cr.execute(
+            """
+            SELECT avg_width FROM pg_stats
+            WHERE schemaname = current_schema() AND tablename = %s AND attname = %s
+            """,
+            [table, column],
+        )
+        row = self.env.cr.fetchone()
+        width = row[0] if row else 8
+        entry = _maxalign(_INDEX_TUPLE_OVERHEAD + width) + _LINE_POINTER_SIZE
+        return int(max(self.estimated_rows, 0) * entry / _BTREE_FILLFACTOR / 1024)
+
+    def _has_hypopg(self) -> bool:
+        self.env.cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+        return bool(self.env.cr.fetchone())
+
+    def _refresh_index_info(self):
+        hypopg = self._has_hypopg()
+        for line in self:
+            table, column = line._get_table_column()
+            self.env.cr.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [table],
+            )
+            line.estimated_rows = self.env.cr.fetchone()[0]
+            index = line._find_index(table, column)
+            line.indexed = bool(index and index[1])
+            line.index_name = index[0] if index else False
+
+            if line.indexed:
+                line.cost_after = line._explain_cost(table, column)
+                self.env.cr.execute(
+                    "SELECT pg_relation_size(%s::regclass) / 1024", [index[0]]
+                )
+                line.estimated_size = self.env.cr.fetchone()[0]
+                continue
+
+            line.cost_before = line._explain_cost(table, column)
+            line.estimated_size = line._estimate_index_size(table, column)
+            if hypopg:
+                # Hypothetical index, only visible to this connection's planner
+                self.env.cr.execute(
+                    "SELECT indexrelid FROM hypopg_create_index(%s)",
+                    [f'CREATE INDEX ON "{table}" ("{column}")'],
+                )
+                index_oid = self.env.cr.fetchone()[0]
+                line.cost_after = line._explain_cost(table, column)
+                self.env.cr.execute(
+                    "SELECT hypopg_relation_size(%s) / 1024", [index_oid]
+                )
+                line.estimated_size = self.env.cr.fetchone()[0]
+                self.env.cr.execute("SELECT hypopg_reset()")
+
+    def action_create_index(self):
+        """
+        Build the missing indexes in the background, once this transaction has
+        committed: a concurrent build waits for every transaction holding an
+        older snapshot, this one included.
+        """
+        lines = self.filtered(
+            lambda line: not line.indexed and line.index_state != "building"
+        )
+        if lines:
+            lines.write({"index_state": "building", "index_error": False})
+            builds = [(line.id, *line._get_table_column()) for line in lines]
+            registry = self.env.registry
+            self.env.cr.postcommit.add(
+                lambda: threading.Thread(
+                    target=_build_indexes,
+                    args=(registry, builds),
+                    name="akm_index_build",
+                    daemon=True,
+                ).start()
+            )
+        return self.advisor_id[:1]._reopen()
+
+
+def _build_indexes(registry, builds):
+    """
+    Build the indexes of `(line_id, table, column)`, then record the outcome
+    on the advisor lines. No cursor is open while an index is built.
+    """
+    for line_id, table, column in builds:
+        error = False
+        try:
+            _create_index(registry.db_name, table, column)
+        except Exception as e:
+            _logger.exception("Creating the index on %s (%s) failed", table, column)
+            error = str(e)
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            line = env["akm.index.advisor.line"].browse(line_id).exists()
+            if line:
+                line.write(
+                    {"index_state": "failed" if error else False, "index_error": error}
+                )
+                line._refresh_index_info()
+
+
+def _create_index(dbname: str, table: str, column: str):
+    """
+    Build the index with `CREATE INDEX CONCURRENTLY`, which cannot run in a
+    transaction, on a separate autocommit connection. An invalid index left by
+    an interrupted build is dropped first.
+    """
+    index_name = make_index_name(table, column)
+    _logger.info("Creating index %s on %s (%s)", index_name, table, column)
+    with db_connect(dbname).cursor() as cr:
+        cr._cnx.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            cr.execute(
+                """
+                SELECT 1 FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE i.relname = %s AND NOT x.indisvalid
+                """,
+                [index_name],
+            )
+            if cr.fetchone():
+                cr.execute(
+                    SQL(
+                        "DROP INDEX CONCURRENTLY IF EXISTS %s",
+                        SQL.identifier(index_name),
+                    )
+                )
+            cr.execute(
+                SQL(
+                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS %s ON %s (%s)",
+                    SQL.identifier(index_name),
+                    SQL.identifier(table),
+                    SQL.identifier(column),
+                )
+            )
+        finally:
+            cr._cnx.set_isolation_level(ISOLATION_LEVEL_REPEATABLE_READ)
@@ -0,0 +1,69 @@
+from odoo import api, fields, models, tools
+
+
+class AkmModelVersion(models.Model):
+    """
+    Change counter of the models clients are allowed to read.
+
+    Bumped after every committed create/write/unlink on a permitted model (see
+    the `base` override), so API result caches can check in one indexed query
+    whether the data they hold is still current.
+    """
+
+    _name = "akm.model.version"
+    _description = "API Model Data Version"
+
+    model = fields.Char(required=True, index=True)
+    version = fields.Integer(default=0, required=True)
+
+    _sql_constraints = [
+        ("unique_model", "unique(model)", "Model must be unique."),
+    ]
+
+    @api.model
+    @tools.ormcache()
+    def _get_tracked_models(self) -> frozenset:
+        """Names of the models at least one client has a permission on."""
+        permissions = self.env["akm.client.permission"].sudo().search([])
+        return frozenset(permissions.mapped("model_id.model"))
+
+    @api.model
+    def _get_version(self, model_name: str) -> int:
+        self.env.cr.execute(
+            "SELECT version FROM akm_model_version WHERE model = %s", [model_name]
+        )
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def _bump_on_commit(self, model_name: str):
+        """
+        Bump the version of `model_name` once the current transaction commits.
+
+        Bumping after the commit guarantees that a reader seeing the new version
+        also sees the new data. The bump runs in its own short READ COMMITTED
+        transaction, so concurrent writers never hold the counter row for long
+        nor fail with serialization errors.
+        """
+        data = self.env.cr.postcommit.data
+        changed = data.get("akm.model.version")
+        if changed is None:
+            changed = data["akm.model.version"] = set()
+            registry = self.env.registry
+
+            @self.env.cr.postcommit.add
+            def bump_versions():
+                with registry.cursor() as cr:
+                    cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+                    for model_name in sorted(changed):
+                        cr.execute(
+                            """
+                            INSERT INTO akm_model_version (model, version)
+                            VALUES (%s, 1)
+                            ON CONFLICT (model)
+                            DO UPDATE SET version = akm_model_version.version + 1
+                            """,
+                            [model_name],
+                        )
+
+        changed.add(model_name)
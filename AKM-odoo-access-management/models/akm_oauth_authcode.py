@@ -1,6 +1,11 @@
 from odoo import models, fields, api
 import secrets
 from datetime import datetime, timedelta
+from typing import Optional
+
+from ..config.constants import TOKEN_DEFAULT_REPLAY_WINDOW, TOKEN_REPLAY_WINDOW_PARAM
+from ..config.utils import get_config_int
+from .akm_oauth_token import IssuedTokens
 
 
 class AkmOAuthAuthCode(models.Model):
@@ -17,6 +22,14 @@ class AkmOAuthAuthCode(models.Model):
     user_name = fields.Char(string="User or System Name")
     expires_at = fields.Datetime()
     used = fields.Boolean(default=False, readonly=True)
+    used_at = fields.Datetime(readonly=True, copy=False)
+    token_id = fields.Many2one(
+        "akm.oauth.token",
+        string="Issued Token",
+        readonly=True,
+        copy=False,
+        ondelete="set null",
+    )
 
     @api.model
     def create_code(self, client_id, user_name):
@@ -37,12 +50,74 @@ class AkmOAuthAuthCode(models.Model):
     def verify_and_use(self, code, client):
         """Verify and consume the authorization code"""
         self.ensure_one()
-        if (
-            self.code == code
-            and self.client_id == client
-            and not self.used
-            and not self.is_expired()
-        ):
-            self.used = True
-            return True
-        return False
+        if self.code != code or self.client_id != client or self.is_expired():
+            return False
+        return self._claim(self.env.cr)
+
+    def _claim(self, cr) -> bool:
+        """Mark the code used, unless it already is, atomically."""
+        cr.execute(
+            """
+            UPDATE akm_oauth_authcode
+            SET used = TRUE, used_at = now() at time zone 'UTC'
+            WHERE id = %s AND NOT used
+            RETURNING id
+            """,
+            [self.id],
+        )
+        claimed = bool(cr.fetchone())
+        self.invalidate_recordset(["used", "used_at"])
+        return claimed
+
+    def redeem(self, scope: str) -> Optional[IssuedTokens]:
+        """
+        Exchange the code for a token pair.
+
+        Like refresh token rotation, the code is claimed in a separate READ
+        COMMITTED transaction, committed with the issued token: a duplicate
+        exchange waits for the first one, and gets its token pair within the
+        replay window.
+
+        Returns:
+            IssuedTokens or None: None if the code was redeemed before the
+            replay window.
+        """
+        self.ensure_one()
+        window = get_config_int(
+            self.env, TOKEN_REPLAY_WINDOW_PARAM, TOKEN_DEFAULT_REPLAY_WINDOW
+        )
+        with self.env.registry.cursor() as cr:
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            code = self.with_env(self.env(cr=cr))
+            if not code._claim(cr):
+                return code._get_replayed_tokens(window)
+
+            token = code.env["akm.oauth.token"].create_token(
+                client=code.client_id, user_name=code.user_name, scope=scope
+            )
+            cr.execute(
+                "UPDATE akm_oauth_authcode SET token_id = %s WHERE id = %s",
+                [token.id, code.id],
+            )
+            return IssuedTokens(token.access_token, token.refresh_token)
+
+    def _get_replayed_tokens(self, window: int) -> Optional[IssuedTokens]:
+        """
+        Token pair issued for the code, if it was redeemed less than `window`
+        seconds ago and the refresh token was neither rotated nor revoked.
+        """
+        if window <= 0:
+            return None
+        self.env.cr.execute(
+            """
+            SELECT token.access_token, token.refresh_token
+            FROM akm_oauth_authcode code
+            JOIN akm_oauth_token token ON token.id = code.token_id
+            WHERE code.id = %s
+              AND code.used_at >= now() at time zone 'UTC' - make_interval(secs => %s)
+              AND token.is_refresh_token_valid
+            """,
+            [self.id, window],
+        )
+        row = self.env.cr.fetchone()
+        return IssuedTokens(*row) if row else None
@@ -1,4 +1,5 @@
 from odoo import models, fields, api
+from ..config import invalidation
 from ..config.utils import validate_http4_url
 import secrets
 
@@ -26,6 +27,9 @@ class AkmOAuthClient(models.Model):
     request_log_ids = fields.One2many(
         "akm.request.log", "client_id", string="Request Logs"
     )
+    webhook_ids = fields.One2many(
+        "akm.webhook.subscription", "client_id", string="Webhooks"
+    )
 
     scope = fields.Selection(
         [
@@ -40,27 +44,83 @@ class AkmOAuthClient(models.Model):
 
     is_active = fields.Boolean(string="Active", default=True)
 
+    allow_compression = fields.Boolean(
+        string="Compress Responses",
+        default=True,
+        help="Compress large API responses when the client accepts gzip or zstd.",
+    )
+
+    # Admission control of `/records`, 0 means no limit
+    max_per_page = fields.Integer(
+        string="Max Records per Page",
+        default=0,
+        help="Largest `per_page` the client may request (0: no limit).",
+    )
+    max_concurrent_requests = fields.Integer(
+        default=0,
+        help="Heavy requests the client may run at the same time across all "
+        "workers (0: no limit). Extra requests wait briefly, then get a 429.",
+    )
+    statement_timeout_ms = fields.Integer(
+        string="Statement Timeout (ms)",
+        default=0,
+        help="Cancel database queries of the client's reads running longer than "
+        "this (0: no limit).",
+    )
+
+    log_sample_rate = fields.Float(
+        default=1.0,
+        help="Share of the client's successful, fast requests written to the "
+        "request log (1: all, 0.1: one in ten). Errors and slow requests are "
+        "always logged.",
+    )
+
+    permission_version = fields.Integer(
+        default=0,
+        readonly=True,
+        copy=False,
+        help="Incremented on every change of the client permissions, so that "
+        "cached API results computed with older permissions are not reused.",
+    )
+
     @api.model_create_multi
     def create(self, vals_list):
         """Override batch create to avoid deprecation warning."""
         for vals in vals_list:
             vals.setdefault("client_id", secrets.token_urlsafe(16))
             vals.setdefault("client_secret", secrets.token_urlsafe(32))
-        return super().create(vals_list)
+        clients = super().create(vals_list)
+        clients._publish_invalidation()
+        return clients
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._publish_invalidation()
+        return res
+
+    def unlink(self):
+        self._publish_invalidation()
+        return super().unlink()
+
+    def init(self):
+        invalidation.create_sequence(self.env.cr)
+
+    def _publish_invalidation(self):
+        """Evict these clients from the per-worker caches of every worker."""
+        for client in self:
+            invalidation.publish(self.env, "client", client.id)
+
+    def action_open_index_advisor(self):
+        self.ensure_one()
+        return self.permission_ids.action_open_index_advisor()
 
     def can_access_model(self, model_name):
         """
-        Now search in 'akm.client.permission' to see if the client has permission for the given model_name.
+        Whether the client has a permission on `model_name`.
         """
         self.ensure_one()
-        permission = self.env["akm.client.permission"].search(
-            [
-                ("client_id", "=", self.id),
-                ("model_id.model", "=", model_name),
-            ],
-            limit=1,
-        )
-        return bool(permission)
+        permissions = self.env["akm.client.permission"]._get_client_permissions(self.id)
+        return model_name in permissions
 
     def can_access_field(self, model_name, field_name):
         """
@@ -71,19 +131,8 @@ class AkmOAuthClient(models.Model):
             return True
 
         self.ensure_one()
-        permission = self.env["akm.client.permission"].search(
-            [
-                ("client_id", "=", self.id),
-                ("model_id.model", "=", model_name),
-            ],
-            limit=1,
-        )
-
-        if not permission:
-            return False
-        if not permission.field_ids:
-            return False
-        return field_name in permission.field_ids.mapped("name")
+        permissions = self.env["akm.client.permission"]._get_client_permissions(self.id)
+        return field_name in permissions.get(model_name, ())
 
     @api.constrains("redirect_uri")
     def _check_redirect_uri(self):
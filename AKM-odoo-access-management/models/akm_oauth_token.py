@@ -1,11 +1,20 @@
 from odoo import models, fields, api
-from typing import Optional
+from typing import NamedTuple, Optional
 from ..config.managers import TokenManager
 from ..config.constants import (
     ACCESS_TOKEN_EXPIRY,
     REFRESH_TOKEN_EXPIRY,
+    TOKEN_DEFAULT_REPLAY_WINDOW,
+    TOKEN_REPLAY_WINDOW_PARAM,
 )
-from ..config.utils import get_current_utc_datetime
+from ..config.utils import get_config_int, get_current_utc_datetime
+
+
+class IssuedTokens(NamedTuple):
+    """Token pair returned by a redemption, fresh or replayed."""
+
+    access_token: str
+    refresh_token: str
 
 
 class AkmOAuthToken(models.Model):
@@ -36,6 +45,19 @@ class AkmOAuthToken(models.Model):
         default=True,
         help="Indicates whether the refresh token is still valid.",
     )
+    rotated_at = fields.Datetime(
+        readonly=True,
+        copy=False,
+        help="When the refresh token was exchanged for a new token pair.",
+    )
+    replaced_by_id = fields.Many2one(
+        "akm.oauth.token",
+        string="Replaced By",
+        readonly=True,
+        copy=False,
+        ondelete="set null",
+        help="Token pair issued in exchange for the refresh token.",
+    )
 
     @api.model
     def create_token(self, client, user_name: str, scope: Optional[str] = None):
@@ -110,15 +132,7 @@ class AkmOAuthToken(models.Model):
         Returns:
             bool: True if valid, False otherwise.
         """
-        if not TokenManager.validate_signature(token, client_secret):
-            return False
-
-        payload = TokenManager.decode_payload(token)
-        if not payload:
-            return False
-        if get_current_utc_datetime().timestamp() > payload.get("exp", 0):
-            return False
-        return True
+        return self._validate_signed_token(token, client_secret)
 
     def validate_refresh_token(self, token: str, client_secret: str) -> bool:
         """
@@ -133,6 +147,10 @@ class AkmOAuthToken(models.Model):
         """
         if not self.is_refresh_token_valid:
             return False
+        return self._validate_signed_token(token, client_secret)
+
+    def _validate_signed_token(self, token: str, client_secret: str) -> bool:
+        """Check the signature and the expiry of a token, not its revocation."""
         if not TokenManager.validate_signature(token, client_secret):
             return False
 
@@ -144,29 +162,74 @@ class AkmOAuthToken(models.Model):
         return True
 
     @api.model
-    def rotate_refresh_token(self, old_token_obj):
+    def rotate_refresh_token(self, old_token_obj) -> Optional[IssuedTokens]:
         """
         Rotate refresh token: invalidate the old and issue a new one.
 
+        The old refresh token is claimed with a conditional update in a
+        separate READ COMMITTED transaction, committed with the new token: of
+        concurrent rotations, one claims it and the others wait for its commit
+        then find it claimed, none fails with a serialization error. Those
+        arriving within the replay window get the token pair of the first.
+
         Args:
             old_token_obj (record): The old token record.
 
         Returns:
-            record: The new token record.
-
-        Raises:
-            ValidationError: If the refresh token is invalid or already used.
+            IssuedTokens or None: The new token pair, None if the refresh token
+            was revoked, or rotated before the replay window.
         """
-        if not old_token_obj.is_refresh_token_valid:
-            raise models.ValidationError("Refresh token is invalid or already used.")
-
-        # Invalidate the old refresh token
-        old_token_obj.is_refresh_token_valid = False
+        window = get_config_int(
+            self.env, TOKEN_REPLAY_WINDOW_PARAM, TOKEN_DEFAULT_REPLAY_WINDOW
+        )
+        with self.env.registry.cursor() as cr:
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            Token = self.with_env(self.env(cr=cr))
+            cr.execute(
+                """
+                UPDATE akm_oauth_token
+                SET is_refresh_token_valid = FALSE,
+                    rotated_at = now() at time zone 'UTC'
+                WHERE id = %s AND is_refresh_token_valid
+                RETURNING id
+                """,
+                [old_token_obj.id],
+            )
+            if not cr.fetchone():
+                return Token._get_replayed_tokens(old_token_obj.id, window)
+
+            old_token = Token.browse(old_token_obj.id)
+            new_token = Token.create_token(
+                client=old_token.client_id,
+                user_name=old_token.user_name,
+                scope=old_token.scope,
+            )
+            cr.execute(
+                "UPDATE akm_oauth_token SET replaced_by_id = %s WHERE id = %s",
+                [new_token.id, old_token.id],
+            )
+            return IssuedTokens(new_token.access_token, new_token.refresh_token)
 
-        # Create a new token
-        new_token = self.create_token(
-            client=old_token_obj.client_id,
-            user_name=old_token_obj.user_name,
-            scope=old_token_obj.scope,
+    @api.model
+    def _get_replayed_tokens(self, token_id: int, window: int):
+        """
+        Token pair that replaced the refresh token of `token_id`, if it was
+        rotated less than `window` seconds ago and its replacement is valid.
+        """
+        if window <= 0:
+            return None
+        self.env.cr.execute(
+            """
+            SELECT replacement.access_token, replacement.refresh_token
+            FROM akm_oauth_token rotated
+            JOIN akm_oauth_token replacement
+                ON replacement.id = rotated.replaced_by_id
+            WHERE rotated.id = %s
+              AND rotated.rotated_at
+                  >= now() at time zone 'UTC' - make_interval(secs => %s)
+              AND replacement.is_refresh_token_valid
+            """,
+            [token_id, window],
         )
-        return new_token
+        row = self.env.cr.fetchone()
+        return IssuedTokens(*row) if row else None
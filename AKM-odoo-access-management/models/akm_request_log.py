@@ -1,5 +1,25 @@
+import json
+
 from odoo import models, fields, api
 
+from ..config.constants import LOG_PARAM_MAX_ITEMS, LOG_PARAM_MAX_STRING
+from ..config.serialization import to_jsonable
+
+
+def _truncate(value, truncated: list):
+    """Shorten long strings and lists of a JSON value, flag it in `truncated`."""
+    if isinstance(value, str) and len(value) > LOG_PARAM_MAX_STRING:
+        truncated.append(True)
+        return value[:LOG_PARAM_MAX_STRING] + "..."
+    if isinstance(value, list):
+        if len(value) > LOG_PARAM_MAX_ITEMS:
+            truncated.append(True)
+            value = value[:LOG_PARAM_MAX_ITEMS]
+        return [_truncate(item, truncated) for item in value]
+    if isinstance(value, dict):
+        return {key: _truncate(item, truncated) for key, item in value.items()}
+    return value
+
 
 class AkmRequestLog(models.Model):
     _name = "akm.request.log"
@@ -8,19 +28,82 @@ class AkmRequestLog(models.Model):
 
     depends = ["base"]
 
-    name = fields.Char(compute="_compute_name", store=True)
+    name = fields.Char(compute="_compute_name")
     client_id = fields.Many2one(
         "akm.oauth.client", string="OAuth Client", ondelete="set null"
     )
-    endpoint = fields.Char(required=True)
+    endpoint_id = fields.Many2one(
+        "akm.request.endpoint", required=True, index=True, ondelete="restrict"
+    )
+    endpoint = fields.Char(related="endpoint_id.name")
     method = fields.Char(required=True)
-    request_params = fields.Text()
+    request_params = fields.Json(
+        help="Request parameters, long strings and lists truncated"
+    )
+    request_params_text = fields.Text(
+        string="Request Params", compute="_compute_request_params_text"
+    )
     status_code = fields.Integer()
+    error_code = fields.Char(index=True)
     ip_address = fields.Char()
-    user_agent = fields.Char()
+    user_agent_id = fields.Many2one("akm.request.user.agent", ondelete="restrict")
+    user_agent = fields.Char(related="user_agent_id.name")
     duration = fields.Float(help="Request duration in seconds")
+    sample_weight = fields.Float(
+        default=1.0,
+        help="Number of requests this row stands for when logging is sampled; "
+        "sum it to estimate request counts",
+    )
+    replica_read = fields.Boolean(help="Records were read from the replica database")
+
+    # Per-phase breakdown, only filled when `akm_oauth.phase_timing` is enabled
+    auth_duration = fields.Float(help="Time spent authenticating, in seconds")
+    permission_duration = fields.Float(
+        help="Time spent checking model and field permissions, in seconds"
+    )
+    search_duration = fields.Float(help="Time spent searching records, in seconds")
+    read_duration = fields.Float(help="Time spent reading records, in seconds")
+    serialize_duration = fields.Float(
+        help="Time spent building the response payload, in seconds"
+    )
+
+    # SQL statistics, only filled when `akm_oauth.sql_profiling` is enabled
+    sql_count = fields.Integer(string="SQL Queries")
+    sql_duration = fields.Float(
+        string="SQL Duration", help="Time spent in SQL queries, in seconds"
+    )
+    sql_slowest = fields.Text(
+        string="Slowest Queries", help="Slowest SQL statements of the request (JSON)"
+    )
 
-    @api.depends("endpoint", "create_date")
+    # Response compression, see `ir.http._akm_compress_response`
+    compression_encoding = fields.Char(help="Content coding of the response body")
+    compression_ratio = fields.Float(help="Uncompressed size / compressed size")
+    compression_duration = fields.Float(help="Time spent compressing, in seconds")
+
+    @api.depends("endpoint_id.name", "create_date")
     def _compute_name(self):
         for record in self:
             record.name = f"{record.endpoint} ({record.create_date})"
+
+    @api.depends("request_params")
+    def _compute_request_params_text(self):
+        for record in self:
+            record.request_params_text = json.dumps(record.request_params, indent=2)
+
+    @api.model
+    def _prepare_request_values(self, endpoint: str, user_agent: str, params) -> dict:
+        """
+        Log values of the request strings: endpoint and user agent as lookup
+        ids, parameters as JSON with long strings and lists truncated.
+        """
+        truncated = []
+        params = _truncate(to_jsonable(params or {}), truncated)
+        if truncated:
+            params["_truncated"] = True
+        return {
+            "endpoint_id": self.env["akm.request.endpoint"]._get_id(endpoint),
+            "user_agent_id": user_agent
+            and self.env["akm.request.user.agent"]._get_id(user_agent),
+            "request_params": params,
+        }
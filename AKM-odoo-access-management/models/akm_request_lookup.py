@@ -0,0 +1,78 @@
+import threading
+from typing import Dict, Tuple
+
+from odoo import api, fields, models
+
+from ..config.constants import LOG_LOOKUP_MAX_LENGTH
+
+# Ids of the lookup values already resolved by this process, per database and
+# model. User agents are unbounded, the cache is reset once it is this large.
+_LOOKUP_CACHE_SIZE = 10000
+_lookup_ids: Dict[Tuple[str, str], Dict[str, int]] = {}
+_lookup_lock = threading.Lock()
+
+
+class AkmRequestLookupMixin(models.AbstractModel):
+    """
+    Deduplicated strings referenced by request logs, so that every log row
+    stores an integer instead of repeating the string.
+    """
+
+    _name = "akm.request.lookup.mixin"
+    _description = "API Request Log Lookup Value"
+
+    name = fields.Char(required=True, readonly=True)
+
+    _sql_constraints = [
+        ("unique_name", "unique(name)", "Value must be unique."),
+    ]
+
+    @api.model
+    def _get_id(self, name: str) -> int:
+        """
+        Return the id of the `name` row, inserting it if missing. `name` is
+        truncated to `LOG_LOOKUP_MAX_LENGTH` characters.
+
+        New values are inserted in a separate READ COMMITTED transaction: a
+        value inserted by a concurrent request after this transaction started
+        is found instead of conflicting, and its id stays valid even if the
+        current transaction rolls back.
+        """
+        name = name[:LOG_LOOKUP_MAX_LENGTH]
+        key = (self.env.cr.dbname, self._name)
+        cache = _lookup_ids.get(key)
+        if cache is not None and name in cache:
+            return cache[name]
+
+        with self.env.registry.cursor() as cr:
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            cr.execute(
+                f"""
+                INSERT INTO {self._table}
+                    (name, create_uid, write_uid, create_date, write_date)
+                VALUES (%s, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')
+                ON CONFLICT (name) DO NOTHING
+                """,
+                [name, self.env.uid, self.env.uid],
+            )
+            cr.execute(f"SELECT id FROM {self._table} WHERE name = %s", [name])
+            record_id = cr.fetchone()[0]
+
+        with _lookup_lock:
+            cache = _lookup_ids.setdefault(key, {})
+            if len(cache) >= _LOOKUP_CACHE_SIZE:
+                cache.clear()
+            cache[name] = record_id
+        return record_id
+
+
+class AkmRequestEndpoint(models.Model):
+    _name = "akm.request.endpoint"
+    _inherit = "akm.request.lookup.mixin"
+    _description = "API Endpoint"
+
+
+class AkmRequestUserAgent(models.Model):
+    _name = "akm.request.user.agent"
+    _inherit = "akm.request.lookup.mixin"
+    _description = "API Client User Agent"
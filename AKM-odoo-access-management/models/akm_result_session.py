@@ -0,0 +1,96 @@
+import array
+import base64
+import itertools
+import secrets
+import zlib
+from datetime import timedelta
+from typing import List
+
+from odoo import api, fields, models
+
+from ..config.constants import RESULT_SESSION_DEFAULT_TTL, RESULT_SESSION_TTL_PARAM
+from ..config.utils import get_config_int
+
+
+def pack_ids(ids: List[int]) -> bytes:
+    """
+    Encode an ordered id list compactly: the differences between consecutive
+    ids as 32-bit integers, zlib-compressed. Ids in search order are mostly
+    close to each other, their differences compress to a few bits each.
+    """
+    previous = itertools.chain((0,), ids)
+    deltas = array.array("i", (b - a for a, b in zip(previous, ids)))
+    return zlib.compress(deltas.tobytes())
+
+
+def unpack_ids(data: bytes) -> List[int]:
+    deltas = array.array("i")
+    deltas.frombytes(zlib.decompress(data))
+    return list(itertools.accumulate(deltas))
+
+
+class AkmResultSession(models.Model):
+    """
+    The ordered ids of a `/records` search, kept for a while so that the
+    pages of the result are read from the same id list, without searching
+    again.
+    """
+
+    _name = "akm.result.session"
+    _description = "API Result Session"
+
+    token = fields.Char(required=True, readonly=True, index=True, copy=False)
+    client_id = fields.Many2one(
+        "akm.oauth.client", string="OAuth Client", required=True, ondelete="cascade"
+    )
+    model_name = fields.Char(required=True)
+    record_count = fields.Integer()
+    ids_data = fields.Binary(attachment=False, help="See `pack_ids`")
+    expires_at = fields.Datetime(required=True, index=True)
+
+    _sql_constraints = [
+        ("unique_token", "unique(token)", "Token must be unique."),
+    ]
+
+    @api.model
+    def _create_session(self, client, model_name: str, ids: List[int]):
+        ttl = get_config_int(
+            self.env, RESULT_SESSION_TTL_PARAM, RESULT_SESSION_DEFAULT_TTL
+        )
+        return self.create(
+            {
+                "token": secrets.token_urlsafe(24),
+                "client_id": client.id,
+                "model_name": model_name,
+                "record_count": len(ids),
+                "ids_data": base64.b64encode(pack_ids(ids)),
+                "expires_at": fields.Datetime.now() + timedelta(seconds=ttl),
+            }
+        )
+
+    @api.model
+    def _get_client_session(self, client, token: str):
+        """The unexpired session `token` of `client`, or an empty recordset."""
+        return self.search(
+            [
+                ("token", "=", token),
+                ("client_id", "=", client.id),
+                ("expires_at", ">", fields.Datetime.now()),
+            ],
+            limit=1,
+        )
+
+    def _get_ids(self) -> List[int]:
+        self.ensure_one()
+        return unpack_ids(base64.b64decode(self.ids_data or b""))
+
+    def _get_info(self) -> dict:
+        self.ensure_one()
+        return {
+            "session": self.token,
+            "session_expires_at": fields.Datetime.to_string(self.expires_at),
+        }
+
+    @api.model
+    def _cron_purge_expired(self):
+        self.search([("expires_at", "<=", fields.Datetime.now())]).unlink()
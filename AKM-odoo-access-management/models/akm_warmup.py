@@ -0,0 +1,89 @@
+import logging
+import time
+
+from odoo import api, models, SUPERUSER_ID
+from odoo.tools import config
+
+from ..config import client_cache, invalidation
+
+_logger = logging.getLogger(__name__)
+
+
+def _warmup_budget() -> float:
+    """Seconds the warm-up may take, `akm_warmup_budget` in the Odoo config."""
+    try:
+        return float(config.get("akm_warmup_budget") or 0)
+    except ValueError:
+        return 0.0
+
+
+class AkmWarmup(models.AbstractModel):
+    """
+    Fill the API caches when the registry is loaded, so that the first
+    requests of a worker do not pay for them. With `--database`, the registry
+    is loaded before the workers are forked and every worker inherits the
+    caches.
+    """
+
+    _name = "akm.warmup"
+    _description = "API Cache Warm-up"
+
+    def _register_hook(self):
+        super()._register_hook()
+        budget = _warmup_budget()
+        # Not while modules are installed or updated, the new cursor would not
+        # see their uncommitted tables
+        if budget <= 0 or self.pool.updated_modules:
+            return
+        try:
+            self._warm_up(time.monotonic() + budget)
+        except Exception:
+            _logger.warning("API cache warm-up failed", exc_info=True)
+
+    @api.model
+    def _warm_up(self, deadline: float):
+        """
+        Preload, until `deadline`: the descriptors of the active clients, their
+        permission matrices, then the field schemas of the permitted models in
+        every installed language.
+        """
+        start = time.monotonic()
+        # A new cursor, whose snapshot starts now: the registry cursor may be
+        # older than the invalidation baseline
+        with self.pool.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            dbname = cr.dbname
+            listening = invalidation.is_listening(dbname)
+            seq = invalidation.current_seq(cr)
+            clients = client_cache.preload(env)
+            if not listening:
+                invalidation.set_baseline(dbname, seq)
+
+            env["akm.model.version"]._get_tracked_models()
+            env["akm.webhook.subscription"]._get_subscribed_models()
+
+            Permission = env["akm.client.permission"]
+            cr.execute("SELECT id FROM akm_oauth_client WHERE is_active")
+            model_names = set()
+            for (client_id,) in cr.fetchall():
+                if time.monotonic() >= deadline:
+                    break
+                model_names.update(Permission._get_client_permissions(client_id))
+
+            schemas = 0
+            for lang, _name in env["res.lang"].get_installed():
+                for model_name in sorted(model_names):
+                    if time.monotonic() >= deadline:
+                        break
+                    if model_name in env:
+                        Permission.with_context(lang=lang)._get_field_schema(model_name)
+                        schemas += 1
+
+        _logger.info(
+            "API caches warmed up in %.2fs: %d clients, %d models, %d schemas%s",
+            time.monotonic() - start,
+            clients,
+            len(model_names),
+            schemas,
+            " (budget exceeded)" if time.monotonic() >= deadline else "",
+        )
@@ -0,0 +1,488 @@
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from odoo import api, fields, models, tools
+from odoo.tools.sql import create_index
+
+from ..config.constants import (
+    WEBHOOK_ALLOWED_HOSTS_PARAM,
+    WEBHOOK_BATCH_SIZE,
+    WEBHOOK_CRON_BUDGET,
+    WEBHOOK_DEAD_RETENTION,
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_MAX_RETRY_DELAY,
+    WEBHOOK_RETRY_DELAY,
+    WEBHOOK_TIMEOUT,
+)
+from ..config.serialization import dumps_bytes
+from ..config.utils import resolve_public_address
+
+_logger = logging.getLogger(__name__)
+
+WEBHOOK_EVENTS = ("create", "write", "unlink")
+
+# Fields deciding which changes are queued, see `_get_subscribed_models`
+_ROUTING_FIELDS = {"model_id", "active", "on_create", "on_write", "on_unlink"}
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """HMAC-SHA256 of `<timestamp>.<body>`, as sent in `X-AKM-Signature`."""
+    message = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class _PinnedHostAdapter(HTTPAdapter):
+    """
+    Transport of a request whose URL was rewritten to a vetted address: TLS
+    still sends and verifies the original host name (SNI, certificate).
+    """
+
+    def __init__(self, hostname: str, **kwargs):
+        self.hostname = hostname
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["server_hostname"] = self.hostname
+        kwargs["assert_hostname"] = self.hostname
+        super().init_poolmanager(*args, **kwargs)
+
+
+def post_pinned(url: str, address: str, headers: Dict[str, str], **kwargs):
+    """
+    POST to `url`, connecting to `address` instead of resolving its host
+    again, with the host in the `Host` header. Proxies of the environment are
+    not used, they would resolve the host themselves.
+    """
+    parsed = urlparse(url)
+    pinned = f"[{address}]" if ":" in address else address
+    host = f"[{parsed.hostname}]" if ":" in parsed.hostname else parsed.hostname
+    if parsed.port is not None:
+        pinned, host = f"{pinned}:{parsed.port}", f"{host}:{parsed.port}"
+    userinfo, at, _ = parsed.netloc.rpartition("@")
+    with requests.Session() as session:
+        session.trust_env = False
+        session.mount("https://", _PinnedHostAdapter(parsed.hostname))
+        return session.post(
+            parsed._replace(netloc=f"{userinfo}{at}{pinned}").geturl(),
+            headers={**headers, "Host": host},
+            **kwargs,
+        )
+
+
+class AkmWebhookSubscription(models.Model):
+    """
+    A client asking to be notified of the changes of a permitted model,
+    instead of polling `/records`.
+    """
+
+    _name = "akm.webhook.subscription"
+    _description = "API Webhook Subscription"
+
+    client_id = fields.Many2one(
+        "akm.oauth.client", string="OAuth Client", required=True, ondelete="cascade"
+    )
+    model_id = fields.Many2one(
+        "ir.model",
+        string="Model",
+        required=True,
+        ondelete="cascade",
+        domain=[("transient", "=", False)],
+    )
+    model_name = fields.Char(related="model_id.model", store=True, index=True)
+    url = fields.Char(string="URL", required=True)
+    secret = fields.Char(
+        readonly=True,
+        copy=False,
+        help="Key of the HMAC-SHA256 signature of the deliveries",
+    )
+    active = fields.Boolean(default=True)
+    on_create = fields.Boolean(default=True)
+    on_write = fields.Boolean(default=True)
+    on_unlink = fields.Boolean(default=True)
+
+    last_delivery_at = fields.Datetime(readonly=True)
+    next_attempt_at = fields.Datetime(
+        readonly=True,
+        copy=False,
+        help="Deliveries are suspended until then after a failed delivery, so "
+        "that the events are retried before the later ones are sent",
+    )
+    last_error = fields.Text(readonly=True)
+    pending_count = fields.Integer(compute="_compute_event_counts")
+    dead_count = fields.Integer(compute="_compute_event_counts")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            vals.setdefault("secret", secrets.token_urlsafe(32))
+        subscriptions = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return subscriptions
+
+    def write(self, vals):
+        res = super().write(vals)
+        if _ROUTING_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.constrains("url")
+    def _check_url(self):
+        for subscription in self:
+            if not self._is_url_allowed(subscription.url):
+                raise models.ValidationError(
+                    "Webhook URL must be an HTTP/HTTPS URL of a public host"
+                )
+
+    @api.model
+    def _is_url_allowed(self, url: str) -> bool:
+        """
+        Whether deliveries may be sent to `url`: HTTP or HTTPS, to a host that
+        resolves to public addresses only, or to one of the hosts of the
+        `akm_oauth.webhook_allowed_hosts` system parameter. Anything else would
+        let a client make the server request internal services.
+        """
+        return self._resolve_url(url) is not None
+
+    @api.model
+    def _resolve_url(self, url: str) -> Optional[str]:
+        """Vetted address to deliver to, see `_is_url_allowed`."""
+        param = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(WEBHOOK_ALLOWED_HOSTS_PARAM, "")
+        )
+        allowed_hosts = {host.strip().lower() for host in param.split(",")}
+        allowed_hosts.discard("")
+        return resolve_public_address(url, allowed_hosts)
+
+    @api.constrains("client_id", "model_id")
+    def _check_model_access(self):
+        for subscription in self:
+            if not subscription.client_id.can_access_model(subscription.model_name):
+                raise models.ValidationError(
+                    f"Client has no permission on model '{subscription.model_name}'"
+                )
+
+    def _compute_event_counts(self):
+        counts = {
+            (subscription.id, state): count
+            for subscription, state, count in self.env["akm.webhook.event"]._read_group(
+                [("subscription_id", "in", self.ids)],
+                ["subscription_id", "state"],
+                ["__count"],
+            )
+        }
+        for subscription in self:
+            subscription.pending_count = counts.get((subscription.id, "pending"), 0)
+            subscription.dead_count = counts.get((subscription.id, "dead"), 0)
+
+    def _get_events(self) -> List[str]:
+        self.ensure_one()
+        return [event for event in WEBHOOK_EVENTS if self[f"on_{event}"]]
+
+    def _get_status(self) -> dict:
+        """Subscription as returned by the webhooks API, without the secret."""
+        self.ensure_one()
+        return {
+            "subscription_id": self.id,
+            "model_name": self.model_name,
+            "url": self.url,
+            "events": self._get_events(),
+            "active": self.active,
+            "pending_events": self.pending_count,
+            "dead_events": self.dead_count,
+            "last_delivery_at": fields.Datetime.to_string(self.last_delivery_at),
+            "next_attempt_at": fields.Datetime.to_string(self.next_attempt_at),
+            "last_error": self.last_error or None,
+        }
+
+    @api.model
+    @tools.ormcache()
+    def _get_subscribed_models(self) -> frozenset:
+        """Names of the models with at least one active subscription."""
+        self.env.cr.execute(
+            "SELECT DISTINCT model_name FROM akm_webhook_subscription WHERE active"
+        )
+        return frozenset(row[0] for row in self.env.cr.fetchall())
+
+    @api.model
+    def _queue_on_commit(self, model_name: str, event: str, ids: List[int]):
+        """
+        Queue an event per subscription and changed record when the current
+        transaction commits. The ids changed by a transaction are collected
+        and inserted in one statement per model and event.
+        """
+        if not ids or model_name not in self._get_subscribed_models():
+            return
+        data = self.env.cr.precommit.data
+        changes = data.get("akm.webhook.event")
+        if changes is None:
+            changes = data["akm.webhook.event"] = {}
+            cr, uid = self.env.cr, self.env.uid
+
+            @self.env.cr.precommit.add
+            def queue_events():
+                for (model, change), record_ids in changes.items():
+                    cr.execute(
+                        f"""
+                        INSERT INTO akm_webhook_event
+                            (subscription_id, record_id, event, state, attempts,
+                             next_attempt_at, create_uid, create_date,
+                             write_uid, write_date)
+                        SELECT s.id, r.id, %(event)s, 'pending', 0,
+                               now() at time zone 'UTC', %(uid)s,
+                               now() at time zone 'UTC', %(uid)s,
+                               now() at time zone 'UTC'
+                        FROM akm_webhook_subscription s,
+                             unnest(%(ids)s) AS r(id)
+                        WHERE s.active AND s.model_name = %(model)s
+                          AND s.on_{change}
+                        """,
+                        {
+                            "event": change,
+                            "uid": uid,
+                            "ids": sorted(record_ids),
+                            "model": model,
+                        },
+                    )
+
+        changes.setdefault((model_name, event), set()).update(ids)
+
+
+class AkmWebhookEvent(models.Model):
+    """
+    Delivery queue of the webhooks: one row per subscription, changed record
+    and kind of change, delivered in coalesced batches by `_cron_deliver`.
+    """
+
+    _name = "akm.webhook.event"
+    _description = "API Webhook Event"
+    _order = "id"
+
+    subscription_id = fields.Many2one(
+        "akm.webhook.subscription", required=True, ondelete="cascade", index=True
+    )
+    client_id = fields.Many2one(related="subscription_id.client_id")
+    model_name = fields.Char(related="subscription_id.model_name")
+    record_id = fields.Integer(required=True)
+    event = fields.Selection(
+        [("create", "Created"), ("write", "Updated"), ("unlink", "Deleted")],
+        required=True,
+    )
+    state = fields.Selection(
+        [("pending", "Pending"), ("dead", "Dead")],
+        default="pending",
+        required=True,
+        help="Dead events failed every delivery attempt, they are kept for "
+        "inspection and can be retried",
+    )
+    attempts = fields.Integer(default=0)
+    next_attempt_at = fields.Datetime(default=fields.Datetime.now)
+    last_error = fields.Text()
+
+    def init(self):
+        create_index(
+            self.env.cr,
+            "akm_webhook_event_due_idx",
+            self._table,
+            ["subscription_id", "next_attempt_at"],
+            where="state = 'pending'",
+        )
+
+    def action_retry(self):
+        """Put dead events back in the queue, and resume their subscriptions."""
+        dead = self.filtered(lambda event: event.state == "dead")
+        dead.write(
+            {
+                "state": "pending",
+                "attempts": 0,
+                "next_attempt_at": fields.Datetime.now(),
+            }
+        )
+        dead.subscription_id.write({"next_attempt_at": False})
+
+    @api.model
+    def _cron_deliver(self):
+        """
+        Deliver the due events, one batch per subscription at a time, until
+        the queue is empty or the run has taken `WEBHOOK_CRON_BUDGET` seconds.
+
+        A failed delivery suspends its subscription until the retry (see
+        `_deliver_batch`): its later events are not sent before the failed
+        ones, nor posted again to the failing receiver during the run.
+        """
+        deadline = time.monotonic() + WEBHOOK_CRON_BUDGET
+        while time.monotonic() < deadline:
+            self.env.cr.execute("""
+                SELECT DISTINCT e.subscription_id
+                FROM akm_webhook_event e
+                JOIN akm_webhook_subscription s ON s.id = e.subscription_id
+                WHERE e.state = 'pending'
+                  AND e.next_attempt_at <= now() at time zone 'UTC'
+                  AND (s.next_attempt_at IS NULL
+                       OR s.next_attempt_at <= now() at time zone 'UTC')
+                """)
+            subscription_ids = [row[0] for row in self.env.cr.fetchall()]
+            delivered = False
+            for subscription_id in subscription_ids:
+                if time.monotonic() >= deadline:
+                    break
+                subscription = self.env["akm.webhook.subscription"].browse(
+                    subscription_id
+                )
+                delivered |= self._deliver_batch(subscription)
+                self.env.cr.commit()
+            if not delivered:
+                break
+
+    @api.model
+    def _deliver_batch(self, subscription) -> bool:
+        """
+        Send the next due events of `subscription` as one signed request.
+
+        The events are locked until the transaction commits, so concurrent
+        deliveries skip them. They are deleted once acknowledged with a 2xx,
+        rescheduled with an exponential backoff otherwise, and dead after
+        `WEBHOOK_MAX_ATTEMPTS` failures. The subscription is suspended until
+        the retry: it then sends the oldest events first, the failed ones.
+
+        Returns:
+            bool: Whether events were claimed.
+        """
+        self.env.cr.execute(
+            """
+            SELECT id, record_id, event, attempts FROM akm_webhook_event
+            WHERE subscription_id = %s AND state = 'pending'
+              AND next_attempt_at <= now() at time zone 'UTC'
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            [subscription.id, WEBHOOK_BATCH_SIZE],
+        )
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return False
+        events = self.browse([row[0] for row in rows])
+
+        client = subscription.client_id
+        if not client.is_active or not client.can_access_model(subscription.model_name):
+            _logger.info(
+                "Dropping %d webhook events of subscription %d, the client lost "
+                "access to %s",
+                len(events),
+                subscription.id,
+                subscription.model_name,
+            )
+            events.unlink()
+            return True
+
+        body = dumps_bytes(
+            {
+                "subscription_id": subscription.id,
+                "model": subscription.model_name,
+                **self._coalesce(rows),
+            }
+        )
+        error = self._post(subscription, body)
+        now = fields.Datetime.now()
+        if error is None:
+            events.unlink()
+            subscription.write(
+                {"last_delivery_at": now, "last_error": False, "next_attempt_at": False}
+            )
+            return True
+
+        attempts = max(row[3] for row in rows) + 1
+        delay = min(WEBHOOK_RETRY_DELAY * 2 ** (attempts - 1), WEBHOOK_MAX_RETRY_DELAY)
+        next_attempt_at = now + timedelta(seconds=delay)
+        dead = attempts >= WEBHOOK_MAX_ATTEMPTS
+        events.write(
+            {
+                "attempts": attempts,
+                "state": "dead" if dead else "pending",
+                "next_attempt_at": next_attempt_at,
+                "last_error": error,
+            }
+        )
+        # Once the batch is dead, the next events are sent after the same delay
+        subscription.write({"last_error": error, "next_attempt_at": next_attempt_at})
+        return True
+
+    @api.model
+    def _coalesce(self, rows) -> Dict[str, List[int]]:
+        """
+        Reduce the events of a batch to one change per record: a deletion wins
+        over anything else, a creation over updates.
+        """
+        ids = {event: set() for event in WEBHOOK_EVENTS}
+        for _event_id, record_id, event, _attempts in rows:
+            ids[event].add(record_id)
+        deleted = ids["unlink"]
+        created = ids["create"] - deleted
+        updated = ids["write"] - deleted - created
+        return {
+            "created": sorted(created),
+            "updated": sorted(updated),
+            "deleted": sorted(deleted),
+        }
+
+    @api.model
+    def _post(self, subscription, body: bytes):
+        """
+        POST a signed delivery, return None on success or the error.
+
+        The URL is checked again, its host may resolve to another address since
+        the subscription, and the request is sent to the address that was
+        checked; redirects are not followed. The error is shown to the client:
+        it never includes the response or the exception message.
+        """
+        address = subscription._resolve_url(subscription.url)
+        if address is None:
+            return "URL not allowed"
+        timestamp = int(time.time())
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "AKM-Webhook/1.0",
+            "X-AKM-Delivery": secrets.token_hex(16),
+            "X-AKM-Timestamp": str(timestamp),
+            "X-AKM-Signature": "sha256="
+            + sign_payload(subscription.secret, timestamp, body),
+        }
+        try:
+            response = post_pinned(
+                subscription.url,
+                address,
+                data=body,
+                headers=headers,
+                timeout=WEBHOOK_TIMEOUT,
+                allow_redirects=False,
+            )
+        except requests.RequestException as e:
+            _logger.info(
+                "Webhook delivery of subscription %d failed: %s", subscription.id, e
+            )
+            return type(e).__name__
+        if not 200 <= response.status_code < 300:
+            return f"HTTP {response.status_code}"
+        return None
+
+    @api.model
+    def _cron_purge_dead(self):
+        """Delete the dead events older than `WEBHOOK_DEAD_RETENTION`."""
+        limit = fields.Datetime.now() - WEBHOOK_DEAD_RETENTION
+        self.search([("state", "=", "dead"), ("write_date", "<", limit)]).unlink()
@@ -0,0 +1,33 @@
+from odoo import api, models
+
+
+class Base(models.AbstractModel):
+    """Track the changes of the models exposed to API clients."""
+
+    _inherit = "base"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._akm_track_change("create")
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._akm_track_change("write")
+        return res
+
+    def unlink(self):
+        self._akm_track_change("unlink")
+        return super().unlink()
+
+    def _akm_track_change(self, event: str):
+        # Skipped while the registry loads, the permission table may not exist yet
+        if not self.pool.ready or self._transient:
+            return
+        versions = self.env["akm.model.version"].sudo()
+        if self._name in versions._get_tracked_models():
+            versions._bump_on_commit(self._name)
+            self.env["akm.webhook.subscription"].sudo()._queue_on_commit(
+                self._name, event, self.ids
+            )
@@ -0,0 +1,71 @@
+from odoo import models
+from odoo.http import request
+from ..config.compression import DEFAULT_MIN_SIZE, compress, negotiate_encoding
+from ..config.constants import API_PREFIX, COMPRESSION_MIN_SIZE_PARAM
+from ..config.utils import get_config_int
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = "ir.http"
+
+    @classmethod
+    def _match(cls, path_info):
+        rule, args = super()._match(path_info)
+        if path_info.startswith(API_PREFIX):
+            # Route template, e.g. `.../exports/<int:job_id>`: the metrics label
+            # of the request, whatever the ids in its path
+            request.akm_route = rule.rule
+        return rule, args
+
+    @classmethod
+    def _post_dispatch(cls, response):
+        super()._post_dispatch(response)
+        if request.httprequest.path.startswith(API_PREFIX):
+            cls._akm_compress_response(response)
+
+    @classmethod
+    def _akm_compress_response(cls, response):
+        """
+        Compress the body of an API response according to `Accept-Encoding`.
+
+        Skipped for streamed, partial or already encoded responses, bodies below
+        the `akm_oauth.compression_min_size` threshold and clients that opted out.
+        The coding, ratio and time spent are stored on the request log row.
+        """
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code not in (200, 201)
+            or "Content-Encoding" in response.headers
+        ):
+            return
+
+        client = getattr(request, "akm_client_descriptor", None)
+        if client and not client.allow_compression:
+            return
+
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate_encoding(request.httprequest.accept_encodings)
+        if not encoding:
+            return
+
+        data = response.get_data()
+        min_size = get_config_int(
+            request.env, COMPRESSION_MIN_SIZE_PARAM, DEFAULT_MIN_SIZE
+        )
+        if len(data) < min_size:
+            return
+
+        compressed, duration = compress(data, encoding)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+
+        log = getattr(request, "akm_log", None)
+        if log:
+            log.write(
+                {
+                    "compression_encoding": encoding,
+                    "compression_ratio": len(data) / max(len(compressed), 1),
+                    "compression_duration": duration,
+                }
+            )
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+End-to-end load generator for the OAuth2.0 and records API.
+
+Runs against an Odoo instance with this module installed, using only the
+Python standard library:
+
+1. Logs in as an Odoo user (who approves the consent screens and, with
+   `--grant-model`, gives the clients a permission on that model).
+2. Sets up `--clients` clients: `/register`, `/authorize` + `/confirm`
+   (consent), then `/token` with the authorization code.
+3. Runs `--concurrency` threads for `--duration` seconds, each sending a
+   weighted mix of `/permissions`, `/records` and refresh token requests.
+4. Prints, per endpoint, the throughput, p50/p95/p99 latency and error rate.
+
+Example:
+
+    python tools/load_test.py --url http://localhost:8069 --db odoo \\
+        --login admin --password admin --grant-model res.partner \\
+        --fields name,email --clients 4 --concurrency 16 --duration 60 \\
+        --mix permissions=1,records=8,refresh=1
+
+Do not run it against production: it creates clients, tokens, permissions and
+request logs.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import secrets
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+MODULE_NAME = "AKM-odoo-access-management"
+API_VERSION = "v1"
+REDIRECT_URI = "https://localhost/akm-load-test/callback"
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Keep the 302 of `/confirm`, its target is a fake redirect URI."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class RequestError(Exception):
+    pass
+
+
+class Stats:
+    """Latencies and errors per endpoint, shared by the worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint: str, duration: float, error: str = None):
+        with self._lock:
+            self.latencies[endpoint].append(duration)
+            if error:
+                self.errors[endpoint][error] += 1
+
+    def report(self, elapsed: float) -> list:
+        rows = []
+        for endpoint in sorted(self.latencies):
+            latencies = sorted(self.latencies[endpoint])
+            count = len(latencies)
+            errors = sum(self.errors[endpoint].values())
+            rows.append(
+                {
+                    "endpoint": endpoint,
+                    "requests": count,
+                    "throughput": count / elapsed if elapsed else 0.0,
+                    "p50_ms": percentile(latencies, 50) * 1000,
+                    "p95_ms": percentile(latencies, 95) * 1000,
+                    "p99_ms": percentile(latencies, 99) * 1000,
+                    "max_ms": latencies[-1] * 1000,
+                    "errors": errors,
+                    "error_rate": errors / count,
+                    "error_codes": dict(self.errors[endpoint]),
+                }
+            )
+        return rows
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def _json_rpc_error(status, headers, body):
+    """Error code of a JSON-RPC response, None when it succeeded."""
+    try:
+        response = json.loads(body)
+    except ValueError:
+        return "INVALID_JSON"
+    if "error" in response:
+        return response["error"].get("data", {}).get("name") or "RPC_ERROR"
+    result = response.get("result")
+    if isinstance(result, dict) and result.get("status") == "error":
+        return result.get("error_code") or "API_ERROR"
+    return None
+
+
+class ApiSession:
+    """HTTP session with its own cookies, timing every call into `stats`."""
+
+    def __init__(self, base_url: str, stats: Stats, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.api_url = f"{self.base_url}/{MODULE_NAME}/{API_VERSION}"
+        self.stats = stats
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect,
+        )
+
+    def _send(self, endpoint: str, request: urllib.request.Request, check=None):
+        """
+        Send `request` and record its latency under `endpoint`.
+
+        `check(status, headers, body)` returns an error code for responses that
+        are received but failed, e.g. JSON-RPC errors.
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            try:
+                response = self.opener.open(request, timeout=self.timeout)
+            except urllib.error.HTTPError as http_error:
+                if http_error.code != 302:
+                    error = f"HTTP {http_error.code}"
+                    raise RequestError(f"{endpoint}: {error}") from http_error
+                response = http_error
+            with response:
+                result = response.status, response.headers, response.read()
+            error = check(*result) if check else None
+            if error:
+                raise RequestError(f"{endpoint}: {error}")
+            return result
+        except (urllib.error.URLError, OSError) as network_error:
+            error = "NETWORK"
+            raise RequestError(f"{endpoint}: {network_error}") from network_error
+        finally:
+            self.stats.record(endpoint, time.perf_counter() - start, error)
+
+    def json_rpc(
+        self, endpoint: str, url: str, params: dict, method="POST", token=None
+    ):
+        """Call a `type="json"` route, return the `result` of the response."""
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = {"jsonrpc": "2.0", "method": "call", "params": params, "id": 1}
+        request = urllib.request.Request(
+            url, json.dumps(payload).encode(), headers, method=method
+        )
+        _, _, body = self._send(endpoint, request, _json_rpc_error)
+        return json.loads(body).get("result")
+
+    def api(self, endpoint: str, params: dict, method="POST", token=None, label=None):
+        """Call an API route, its samples are reported under `label` if given."""
+        return self.json_rpc(
+            label or endpoint, f"{self.api_url}/{endpoint}", params, method, token
+        )
+
+
+class ClientState:
+    def __init__(self, client_id: str, client_secret: str):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.access_token = None
+        self.refresh_token = None
+        self.lock = threading.Lock()
+
+
+def login(session: ApiSession, db: str, user: str, password: str):
+    session.json_rpc(
+        "web/session/authenticate",
+        f"{session.base_url}/web/session/authenticate",
+        {"db": db, "login": user, "password": password},
+    )
+
+
+def call_kw(session: ApiSession, model: str, method: str, args: list, kwargs=None):
+    return session.json_rpc(
+        "web/dataset/call_kw",
+        f"{session.base_url}/web/dataset/call_kw/{model}/{method}",
+        {"model": model, "method": method, "args": args, "kwargs": kwargs or {}},
+    )
+
+
+def grant_permission(session: ApiSession, client_id: str, model: str, fields: list):
+    """Give the client access to `fields` of `model`, as the logged in user."""
+    clients = call_kw(
+        session,
+        "akm.oauth.client",
+        "search_read",
+        [[("client_id", "=", client_id)]],
+        {"fields": ["id"], "limit": 1},
+    )
+    models = call_kw(
+        session,
+        "ir.model",
+        "search_read",
+        [[("model", "=", model)]],
+        {"fields": ["id"]},
+    )
+    if not clients or not models:
+        raise RequestError(f"Unable to grant {model} to {client_id}")
+    field_ids = []
+    if fields:
+        field_ids = [
+            field["id"]
+            for field in call_kw(
+                session,
+                "ir.model.fields",
+                "search_read",
+                [[("model", "=", model), ("name", "in", fields)]],
+                {"fields": ["id"]},
+            )
+        ]
+    call_kw(
+        session,
+        "akm.client.permission",
+        "create",
+        [
+            {
+                "client_id": clients[0]["id"],
+                "model_id": models[0]["id"],
+                "field_ids": [(6, 0, field_ids)],
+            }
+        ],
+    )
+
+
+def setup_client(session: ApiSession, args, index: int) -> ClientState:
+    """Register a client, approve its consent and exchange the code."""
+    result = session.api(
+        "register",
+        {
+            "name": f"Load test {index} {secrets.token_hex(4)}",
+            "redirect_uri": REDIRECT_URI,
+        },
+    )
+    client = ClientState(result["data"]["client_id"], result["data"]["client_secret"])
+    if args.grant_model:
+        grant_permission(session, client.client_id, args.grant_model, args.field_list)
+
+    state = secrets.token_urlsafe(16)
+    query = urllib.parse.urlencode(
+        {
+            "client_id": client.client_id,
+            "response_type": "code",
+            "scope": "read",
+            "state": state,
+        }
+    )
+    session._send(
+        "authorize", urllib.request.Request(f"{session.api_url}/authorize?{query}")
+    )
+    form = urllib.parse.urlencode(
+        {
+            "decision": "allow",
+            "client_id": client.client_id,
+            "scope": "read",
+            "state": state,
+        }
+    ).encode()
+    status, headers, _ = session._send(
+        "confirm",
+        urllib.request.Request(f"{session.api_url}/confirm", form, method="POST"),
+    )
+    location = headers.get("Location", "") if status == 302 else ""
+    code = urllib.parse.parse_qs(urllib.parse.urlparse(location).query).get("code")
+    if not code:
+        raise RequestError(f"No authorization code for {client.client_id}")
+
+    result = session.api(
+        "token",
+        {
+            "grant_type": "authorization_code",
+            "code": code[0],
+            "client_id": client.client_id,
+            "client_secret": client.client_secret,
+            "scope": "read",
+        },
+    )
+    client.access_token = result["data"]["access_token"]
+    client.refresh_token = result["data"]["refresh_token"]
+    return client
+
+
+def refresh(session: ApiSession, client: ClientState):
+    with client.lock:
+        result = session.api(
+            "token",
+            {
+                "grant_type": "refresh_token",
+                "refresh_token": client.refresh_token,
+                "client_id": client.client_id,
+                "client_secret": client.client_secret,
+            },
+            label="token (refresh_token)",
+        )
+        client.access_token = result["data"]["access_token"]
+        client.refresh_token = result["data"]["refresh_token"]
+
+
+def run_worker(args, stats: Stats, clients: list, worker: int, deadline: float):
+    session = ApiSession(args.url, stats, args.timeout)
+    rng = random.Random(args.seed + worker if args.seed is not None else None)
+    operations, weights = zip(*args.mix.items())
+    client = clients[worker % len(clients)]
+    while time.monotonic() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        try:
+            if operation == "refresh":
+                refresh(session, client)
+            elif operation == "permissions":
+                session.api("permissions", {}, "GET", client.access_token)
+            else:
+                params = {
+                    "model_name": args.records_model,
+                    "fields": args.fields,
+                    "page": rng.randint(1, args.pages),
+                    "per_page": args.per_page,
+                    "count": args.count,
+                }
+                session.api("records", params, "GET", client.access_token)
+        except RequestError:
+            pass
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ("permissions", "records", "refresh"):
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("The mix needs a positive weight")
+    return mix
+
+
+def print_report(title: str, rows: list):
+    print(f"\n{title}")
+    header = (
+        f"{'endpoint':<30}{'requests':>9}{'req/s':>9}{'p50 ms':>9}"
+        f"{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}{'err %':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['endpoint']:<30}{row['requests']:>9}{row['throughput']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            f"{row['max_ms']:>9.1f}{row['errors']:>8}{row['error_rate']:>7.1%}"
+        )
+        if row["error_codes"]:
+            print(f"{'':<30}{row['error_codes']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8069")
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--login", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default="permissions=1,records=8,refresh=1",
+        help="weights of the operations, e.g. permissions=1,records=8,refresh=1",
+    )
+    parser.add_argument(
+        "--grant-model", help="model to give the clients access to, e.g. res.partner"
+    )
+    parser.add_argument("--records-model", help="model read by /records")
+    parser.add_argument("--fields", default="*", help="fields granted and read")
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=5, help="pages read at random")
+    parser.add_argument("--count", default="exact", help="count mode of /records")
+    parser.add_argument("--timeout", type=float, default=60, help="HTTP timeout")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args(argv)
+
+    args.records_model = args.records_model or args.grant_model
+    args.field_list = [f for f in args.fields.split(",") if f and f != "*"]
+    if args.mix.get("records") and not args.records_model:
+        parser.error("/records traffic needs --records-model or --grant-model")
+
+    setup_stats = Stats()
+    session = ApiSession(args.url, setup_stats, args.timeout)
+    setup_start = time.monotonic()
+    try:
+        login(session, args.db, args.login, args.password)
+        clients = [setup_client(session, args, i) for i in range(args.clients)]
+    except RequestError as error:
+        print_report("Setup", setup_stats.report(time.monotonic() - setup_start))
+        sys.exit(f"Setup failed: {error}")
+    setup_elapsed = time.monotonic() - setup_start
+
+    stats = Stats()
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=run_worker, args=(args, stats, clients, i, deadline))
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    setup_rows = setup_stats.report(setup_elapsed)
+    rows = stats.report(elapsed)
+    if args.json:
+        print(json.dumps({"setup": setup_rows, "load": rows, "elapsed": elapsed}))
+        return
+    print_report("Setup (sequential)", setup_rows)
+    print_report(
+        f"Load: {args.concurrency} threads, {args.clients} clients, {elapsed:.1f}s",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Stand-in receiver for the webhook deliveries of the module.
+
+Listens on a local port, checks the `X-AKM-Signature` of every delivery with
+the subscription secret and prints the batches. Only uses the Python standard
+library.
+
+Example:
+
+    python tools/webhook_receiver.py --port 8099 --secret SUBSCRIPTION_SECRET
+
+then add `localhost` to the `akm_oauth.webhook_allowed_hosts` system parameter
+and subscribe with `"url": "http://localhost:8099/"`. Use `--fail-rate` to
+answer a share of the deliveries with a 500 and watch them being retried,
+or `--status 410` to send every event to the dead state.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Deliveries signed longer ago than this are rejected, as a receiver should
+MAX_CLOCK_SKEW = 300
+
+
+def verify_signature(
+    secret: str, timestamp: str, body: bytes, signature: str, now: float = None
+) -> bool:
+    """Check a delivery the way receivers are expected to."""
+    try:
+        age = (now or time.time()) - int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs(age) > MAX_CLOCK_SKEW:
+        return False
+    message = f"{timestamp}.".encode() + body
+    expected = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature or "")
+
+
+def make_handler(args):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if args.secret and not verify_signature(
+                args.secret,
+                self.headers.get("X-AKM-Timestamp"),
+                body,
+                self.headers.get("X-AKM-Signature"),
+            ):
+                print("Rejected: invalid signature", file=sys.stderr)
+                return self._reply(401)
+
+            status = args.status
+            if random.random() < args.fail_rate:
+                status = 500
+            payload = json.loads(body)
+            print(
+                json.dumps(
+                    {
+                        "delivery": self.headers.get("X-AKM-Delivery"),
+                        "status": status,
+                        "model": payload.get("model"),
+                        "created": payload.get("created"),
+                        "updated": payload.get("updated"),
+                        "deleted": payload.get("deleted"),
+                    }
+                ),
+                flush=True,
+            )
+            self._reply(status)
+
+        def _reply(self, status: int):
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *log_args):
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--secret", help="subscription secret, to check signatures")
+    parser.add_argument("--status", type=int, default=200, help="response status")
+    parser.add_argument(
+        "--fail-rate", type=float, default=0.0, help="share of 500 responses"
+    )
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"Listening on http://{args.host}:{args.port}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()